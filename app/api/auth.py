@@ -1,11 +1,56 @@
+import os
+import hmac
+import hashlib
 import binascii
 import bcrypt
 from fastapi import HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from ..models.diploma_repository import DiplomaRepository
+from ..models.async_diploma_repository import AsyncDiplomaRepository
+from ..models.cache import TTLCache, on_user_invalidated
 
 security = HTTPBasic()
 
+AUTH_CACHE_TTL = int(os.environ.get("AUTH_CACHE_TTL", 60))
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 1024))
+
+class CredentialCache:
+    """
+    Кэш успешно проверенных учётных данных.
+
+    Ключ — HMAC от имени пользователя, пароля и хранимого в базе хеша пароля на
+    секрете процесса, поэтому пароли в памяти не хранятся, а после смены пароля
+    старые записи просто перестают совпадать. Записи живут ttl секунд; кэш
+    ограничен max_size записями и вытесняет самые давно использованные.
+    """
+
+    def __init__(self, ttl: int = 60, max_size: int = 1024):
+        self._secret = os.urandom(32)
+        self._cache = TTLCache(ttl=ttl, max_size=max_size)
+
+    def _key(self, username: str, password: str, password_hash: str) -> bytes:
+        message = b"\0".join(value.encode("utf-8") for value in (username, password, password_hash))
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def verified(self, username: str, password: str, password_hash: str) -> bool:
+        return self._cache.get(self._key(username, password, password_hash)) is not None
+
+    def put(self, username: str, password: str, user: dict):
+        self._cache.put(self._key(username, password, user["password"]), user["id"])
+
+    def invalidate_user(self, user_id=None):
+        """
+        Удаляет записи пользователя (или все записи, если id не указан)
+        """
+        if user_id is None:
+            self._cache.invalidate()
+        else:
+            self._cache.invalidate_where(lambda cached_id: cached_id == user_id)
+
+credential_cache = CredentialCache(ttl=AUTH_CACHE_TTL, max_size=AUTH_CACHE_SIZE)
+# Сброс пользователя (в том числе по NOTIFY 'user:<id>') сбрасывает и его учётные данные
+on_user_invalidated(credential_cache.invalidate_user)
+
 def verify_password(plain_password, hashed_password):
     plain_password_bytes = plain_password.encode('utf-8')
     hashed_password_bytes = hashed_password.encode('utf-8')
@@ -21,20 +66,24 @@ def verify_password(plain_password, hashed_password):
 
 async def authenticate_user(credentials: HTTPBasicCredentials = Depends(security)):
     try:   
-        user = DiplomaRepository.get_user_by_username(credentials.username)
+        # Пользователь читается всегда: отключение и смена пароля действуют сразу,
+        # кэш избавляет только от повторной проверки bcrypt
+        user = await AsyncDiplomaRepository.get_user_by_username(credentials.username)
         
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Неверное имя пользователя или пароль",
-                headers={"WWW-Authenticate": "Basic"},
-            )        
-        if not verify_password(credentials.password, user["password"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Неверное имя пользователя или пароль",
                 headers={"WWW-Authenticate": "Basic"},
             )
+        if not credential_cache.verified(credentials.username, credentials.password, user["password"]):
+            if not await run_in_threadpool(verify_password, credentials.password, user["password"]):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Неверное имя пользователя или пароль",
+                    headers={"WWW-Authenticate": "Basic"},
+                )
+            credential_cache.put(credentials.username, credentials.password, user)
         if not user["enabled"]:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,5 +97,4 @@ async def authenticate_user(credentials: HTTPBasicCredentials = Depends(security
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Ошибка аутентификации",
             headers={"WWW-Authenticate": "Basic"},
-        ) 
-    
\ No newline at end of file
+        )
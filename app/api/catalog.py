@@ -0,0 +1,89 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from ..models.async_diploma_repository import AsyncDiplomaRepository
+from ..models.queries import decode_tasks
+from .auth import authenticate_user
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+class CatalogPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+def _encode_cursor(item: dict) -> str:
+    payload = json.dumps([item["created_at"].isoformat(), item["id"]])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """
+    Курсор страницы — (created_at, id) последней строки предыдущей страницы
+    """
+    if not cursor:
+        return None
+    try:
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор страницы"
+        )
+
+def _page(items: list, limit: int) -> CatalogPage:
+    next_cursor = None
+    if len(items) == limit and items[-1]["created_at"] is not None:
+        next_cursor = _encode_cursor(items[-1])
+    return CatalogPage(items=items, next_cursor=next_cursor)
+
+def _with_tasks(diploma: dict) -> dict:
+    # Репозиторий отдаёт JSON заданий неразобранным; разбираем только отдаваемые строки
+    diploma["tasks"] = decode_tasks(diploma["tasks"])
+    return diploma
+
+async def _export_lines(rows, prepare=None):
+    async for row in rows:
+        if prepare is not None:
+            row = prepare(row)
+        yield json.dumps(jsonable_encoder(row), ensure_ascii=False) + "\n"
+
+@router.get("/topics", response_model=CatalogPage)
+async def get_topics_page(
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(50, ge=1, le=500, description="Размер страницы"),
+    current_user = Depends(authenticate_user)
+):
+    items = await AsyncDiplomaRepository.get_topics_page(_decode_cursor(cursor), limit)
+    return _page(items, limit)
+
+@router.get("/users", response_model=CatalogPage)
+async def get_users_page(
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(50, ge=1, le=500, description="Размер страницы"),
+    current_user = Depends(authenticate_user)
+):
+    items = await AsyncDiplomaRepository.get_users_page(_decode_cursor(cursor), limit)
+    return _page(items, limit)
+
+@router.get("/diplomas", response_model=CatalogPage)
+async def get_diplomas_page(
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(50, ge=1, le=500, description="Размер страницы"),
+    current_user = Depends(authenticate_user)
+):
+    items = await AsyncDiplomaRepository.get_diplomas_page(_decode_cursor(cursor), limit)
+    return _page([_with_tasks(item) for item in items], limit)
+
+@router.get("/diplomas/export")
+async def export_diplomas(current_user = Depends(authenticate_user)):
+    # Выгрузка всех дипломов построчно (NDJSON) через серверный курсор
+    return StreamingResponse(
+        _export_lines(AsyncDiplomaRepository.iter_all_diplomas(), _with_tasks),
+        media_type="application/x-ndjson"
+    )
@@ -1,11 +1,23 @@
+import io
 import os
-import shutil
-from typing import Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import json
+import hashlib
+import tempfile
+import zipfile
+from functools import lru_cache
+from typing import Dict, List, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from ..core.diploma_generator import DiplomaService
-from ..models.diploma_repository import DiplomaRepository
+from ..core.job_queue import JobQueue
+from ..core.single_flight import AsyncSingleFlight
+from ..core.storage import write_atomic
+from ..models.cached_repository import AsyncCachedDiplomaRepository
 from .auth import authenticate_user
+from .public import PUBLIC_DIR, etag_matches, public_store
 
 router = APIRouter(prefix="/diploma", tags=["diploma"])
 
@@ -13,82 +25,258 @@ class DiplomaResponse(BaseModel):
     message: str
     links: Dict[str, str]
 
+class DiplomaJobResponse(BaseModel):
+    job_id: str
+    status: str
+    message: Optional[str] = None
+    links: Dict[str, str] = {}
+    error: Optional[str] = None
+
+class DiplomaBatchRequest(BaseModel):
+    topicId: int
+    userIds: Optional[List[int]] = None
+    archive: bool = False
+
 SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 ASSETS_DIR = os.path.join(SCRIPT_DIR, "assets")
-PUBLIC_DIR = os.path.join(SCRIPT_DIR, "public")
+ISSUED_BY = "Welding & Sons"
+
+job_queue = JobQueue(
+    max_workers=int(os.environ.get("DIPLOMA_JOB_WORKERS", 2)),
+    ttl=int(os.environ.get("DIPLOMA_JOB_TTL", 3600))
+)
+
+# Повторные запросы (двойной клик, повтор клиента после таймаута) одной пары
+# (пользователь, тема) ждут уже идущую генерацию и получают те же ссылки
+generation_flight = AsyncSingleFlight()
+
+@lru_cache(maxsize=1)
+def get_diploma_service() -> DiplomaService:
+    logo_path = os.path.join(ASSETS_DIR, "headIco.png")
+    if not os.path.exists(logo_path):
+        logo_path = None
+
+    return DiplomaService(
+        logo_path=logo_path,
+        diploma_template=os.path.join(SCRIPT_DIR, "assets", "diploma.xlsx"),
+        appendix_template=os.path.join(SCRIPT_DIR, "assets", "diploma-addition.xlsx")
+    )
+
+async def _load_diploma_context(user_id: int, topic_id: int) -> dict:
+    context = await AsyncCachedDiplomaRepository.load_diploma_context(user_id, topic_id)
+    if not context["user"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Пользователь с ID {user_id} не найден"
+        )
+
+    if not context["topic"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Тема с ID {topic_id} не найдена"
+        )
+    return context
+
+def _generate_diploma_response(context: dict) -> DiplomaResponse:
+    user = context["user"]
+    topic = context["topic"]
+    diploma_service = get_diploma_service()
+
+    result = diploma_service.render_pdfs_by_user_and_topic(
+        user_id=user["id"],
+        topic_id=topic["id"],
+        issued_by=ISSUED_BY,
+        context=context
+    )
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(PUBLIC_DIR, exist_ok=True)
+    if any(content is None for _, content in result.values()):
+        raise RuntimeError("Ошибка при экспорте в PDF")
+
+    public_files = {
+        kind: _publish(filename, content)
+        for kind, (filename, content) in result.items()
+    }
+    return DiplomaResponse(
+        message=f"Диплом успешно сгенерирован для {user['full_name']} по теме '{topic['title']}'",
+        links=public_files
+    )
+
+def _content_disposition(disposition: str, filename: str) -> str:
+    # Имя файла с кириллицей передаётся через filename*, для старых клиентов — ASCII-замена
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace("?", "_")
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+def _generate_inline_response(context: dict, document: str, if_none_match: Optional[str]) -> Response:
+    user = context["user"]
+    topic = context["topic"]
+    diploma_service = get_diploma_service()
+
+    # ETag — ключ содержимого: повторный запрос того же диплома получает 304 без рендеринга
+    key = diploma_service.pdf_key_by_user_and_topic(
+        user_id=user["id"],
+        topic_id=topic["id"],
+        issued_by=ISSUED_BY,
+        context=context
+    )
+    etag = f'"{key[:32]}-{document}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    result = diploma_service.render_pdfs_by_user_and_topic(
+        user_id=user["id"],
+        topic_id=topic["id"],
+        issued_by=ISSUED_BY,
+        context=context
+    )
+    kinds = ("diploma", "appendix") if document == "all" else (document,)
+    if any(result[kind][1] is None for kind in kinds):
+        raise RuntimeError("Ошибка при экспорте в PDF")
+
+    if document == "all":
+        buffer = io.BytesIO()
+        # PDF уже сжаты, поэтому архив без сжатия
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for kind in kinds:
+                filename, content = result[kind]
+                archive.writestr(filename, content)
+        content = buffer.getvalue()
+        filename = os.path.splitext(result["diploma"][0])[0] + ".zip"
+        media_type = "application/zip"
+        headers["Content-Disposition"] = _content_disposition("attachment", filename)
+    else:
+        filename, content = result[document]
+        media_type = "application/pdf"
+        headers["Content-Disposition"] = _content_disposition("inline", filename)
+
+    return Response(content=content, media_type=media_type, headers=headers)
+
+async def _generate_diploma_links(user_id: int, topic_id: int) -> DiplomaResponse:
+    context = await _load_diploma_context(user_id, topic_id)
+    return await run_in_threadpool(_generate_diploma_response, context)
+
+def _publish(filename: str, content: bytes) -> str:
+    # Имя файла содержит ключ содержимого: если файл уже опубликован, он тот же самый
+    if public_store.lookup(filename) is None:
+        public_store.put(filename, content)
+    return f"/public/{filename}"
+
+def _build_archive(topic_id: int, manifest: dict) -> str:
+    # Имя архива — по составу файлов: одинаковый пакет даёт тот же архив,
+    # а одновременные пакеты не пишут в один временный файл
+    names = sorted(os.path.basename(link) for links in manifest.values() for link in links.values())
+    key = hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()
+    filename = f"diplomas_topic_{topic_id}_{key[:16]}.zip"
+    if public_store.lookup(filename):
+        return f"/public/{filename}"
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=PUBLIC_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_STORED) as archive:
+            for name in names:
+                path = public_store.lookup(name)
+                if path:
+                    archive.write(path, name)
+        os.chmod(tmp_path, 0o644)
+        public_store.put_file(filename, tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return f"/public/{filename}"
+
+def _batch_events(diploma_service: DiplomaService, batch: dict, archive: bool):
+    manifest = {}
+    for event in diploma_service.generate_batch(batch, issued_by=ISSUED_BY):
+        if event["event"] == "converted":
+            event["links"] = {
+                kind: _publish(filename, content)
+                for kind, (filename, content) in event.pop("files").items()
+            }
+            manifest[event["userId"]] = event["links"]
+        elif event["event"] == "finished":
+            event["manifest"] = manifest
+            if archive and manifest:
+                event["archive"] = _build_archive(batch["topic"]["id"], manifest)
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+
+def _job_response(job: dict) -> DiplomaJobResponse:
+    result = job["result"]
+    return DiplomaJobResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        message=result.message if result else None,
+        links=result.links if result else {},
+        error=job["error"]
+    )
 
 @router.get("/generate", response_model=DiplomaResponse)
 async def generate_diploma(
     topicId: int = Query(..., description="ID темы"),
     userId: int = Query(..., description="ID пользователя"),
+    delivery: str = Query("links", pattern="^(links|inline)$",
+                          description="links — ссылки на файлы, inline — файлы в теле ответа"),
+    document: str = Query("all", pattern="^(all|diploma|appendix)$",
+                          description="Для delivery=inline: диплом, приложение или ZIP с обоими"),
+    if_none_match: Optional[str] = Header(None),
     current_user = Depends(authenticate_user)
 ):
     try:
-        user = DiplomaRepository.get_user_by_id(userId)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Пользователь с ID {userId} не найден"
-            )
-
-        topic = DiplomaRepository.get_topic_by_id(topicId)
-        if not topic:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Тема с ID {topicId} не найдена"
-            )
-
-        logo_path = os.path.join(ASSETS_DIR, "headIco.png")
-        if not os.path.exists(logo_path):
-            logo_path = None
-        
-        diploma_service = DiplomaService(
-            logo_path=logo_path,
-            diploma_template=os.path.join(SCRIPT_DIR, "assets", "diploma.xlsx"),
-            appendix_template=os.path.join(SCRIPT_DIR, "assets", "diploma-addition.xlsx")
+        if delivery == "inline":
+            context = await _load_diploma_context(userId, topicId)
+            return await run_in_threadpool(_generate_inline_response, context, document, if_none_match)
+        return await generation_flight.do((userId, topicId), _generate_diploma_links, userId, topicId)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Произошла ошибка при генерации диплома: {str(e)}"
         )
-        
-        result = diploma_service.generate_diploma_by_user_and_topic(
-            user_id=userId,
-            topic_id=topicId,
-            output_dir=OUTPUT_DIR,
-            issued_by="Welding & Sons"
+
+@router.post("/jobs", response_model=DiplomaJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_diploma_job(
+    topicId: int = Query(..., description="ID темы"),
+    userId: int = Query(..., description="ID пользователя"),
+    current_user = Depends(authenticate_user)
+):
+    context = await _load_diploma_context(userId, topicId)
+    job_id = job_queue.submit(_generate_diploma_response, context)
+    return _job_response(job_queue.get(job_id))
+
+@router.get("/jobs/{job_id}", response_model=DiplomaJobResponse)
+async def get_diploma_job(
+    job_id: str,
+    current_user = Depends(authenticate_user)
+):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Задание {job_id} не найдено"
         )
+    return _job_response(job)
 
-        filename_base = os.path.basename(result['diploma_excel']).replace('.xlsx', '')
-        
-        public_files = {}
-        for key, filepath in result.items():
-            if filepath and key.endswith('_pdf'):
-                filename = os.path.basename(filepath)
-                public_path = os.path.join(PUBLIC_DIR, filename)
-                shutil.copy2(filepath, public_path)
-                if key == 'diploma_pdf':
-                    public_files['diploma'] = f"/public/{filename}"
-                elif key == 'appendix_pdf':
-                    public_files['appendix'] = f"/public/{filename}"
-        try:
-            if 'diploma_excel' in result and result['diploma_excel'] and os.path.exists(result['diploma_excel']):
-                os.remove(result['diploma_excel'])
-                
-            if 'appendix_excel' in result and result['appendix_excel'] and os.path.exists(result['appendix_excel']):
-                os.remove(result['appendix_excel'])
-        except Exception as e:
-            print(f"Ошибка при удалении Excel файлов: {e}")
-        return DiplomaResponse(
-            message=f"Диплом успешно сгенерирован для {user['full_name']} по теме '{topic['title']}'",
-            links=public_files
+@router.post("/batch")
+async def generate_diploma_batch(
+    request: DiplomaBatchRequest,
+    current_user = Depends(authenticate_user)
+):
+    diploma_service = get_diploma_service()
+    try:
+        batch = await run_in_threadpool(diploma_service.load_batch, request.topicId, request.userIds)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
         )
-    
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Произошла ошибка при генерации диплома: {str(e)}"
-        ) 
-    
\ No newline at end of file
+            detail=f"Произошла ошибка при подготовке пакетной генерации: {str(e)}"
+        )
+
+    return StreamingResponse(
+        _batch_events(diploma_service, batch, request.archive),
+        media_type="application/x-ndjson"
+    )
@@ -1,23 +1,61 @@
 import os
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
-from .diploma import router as diploma_router
+from fastapi.responses import JSONResponse
+from ..core.pdf_config import STORAGE_CONFIG
+from ..core.retention import FileStore, run_retention
+from ..models.database import Database
+from ..models.async_database import AsyncDatabase
+from ..models.cache import listen_for_invalidations, cache_stats
+from ..models.db_config import CACHE_CONFIG
+from ..models.statements import statement_registry
+from .diploma import router as diploma_router, job_queue, get_diploma_service, generation_flight
+from .catalog import router as catalog_router
+from .public import router as public_router, public_store
+
+def _retention_stores() -> list:
+    stores = [public_store]
+    # output/ заполняется генерацией в файлы (generate_diploma_with_appendix с output_dir)
+    if os.path.isdir(STORAGE_CONFIG['output_dir']):
+        stores.append(FileStore(
+            STORAGE_CONFIG['output_dir'],
+            max_age=STORAGE_CONFIG['output_max_age'],
+            max_bytes=STORAGE_CONFIG['output_max_bytes'],
+            rescan=True
+        ))
+    return stores
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Процессы рендеринга запускаются первыми и из основного потока, до появления фоновых потоков
+    diploma_service = get_diploma_service()
+    diploma_service.start()
+    await AsyncDatabase.initialize()
+    listener = None
+    if CACHE_CONFIG['channel']:
+        listener = asyncio.create_task(listen_for_invalidations(CACHE_CONFIG['channel']))
+    retention = asyncio.create_task(run_retention(_retention_stores(), STORAGE_CONFIG['sweep_interval']))
+    yield
+    for task in (listener, retention):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    job_queue.shutdown()
+    diploma_service.shutdown()
+    await AsyncDatabase.close_all()
 
 app = FastAPI(
     title="Генератор дипломов API",
     description="API для генерации дипломов и приложений к ним",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(diploma_router)
-
-SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-PUBLIC_DIR = os.path.join(SCRIPT_DIR, "public")
-
-os.makedirs(PUBLIC_DIR, exist_ok=True)
-
-app.mount("/public", StaticFiles(directory=PUBLIC_DIR), name="public")
+app.include_router(catalog_router)
+app.include_router(public_router)
 
 @app.get("/")
 async def root():
@@ -27,15 +65,42 @@ async def root():
         "status": "active",
         "endpoints": {
             "diploma_generate": "/diploma/generate?topicId=1&userId=1",
-            "public_files": "/public/{filename}"
+            "diploma_generate_inline": "/diploma/generate?topicId=1&userId=1&delivery=inline&document=all",
+            "diploma_job_create": "POST /diploma/jobs?topicId=1&userId=1",
+            "diploma_job_status": "/diploma/jobs/{job_id}",
+            "diploma_batch": "POST /diploma/batch",
+            "catalog_topics": "/catalog/topics?limit=50&cursor=...",
+            "catalog_users": "/catalog/users?limit=50&cursor=...",
+            "catalog_diplomas": "/catalog/diplomas?limit=50&cursor=...",
+            "catalog_diplomas_export": "/catalog/diplomas/export",
+            "public_files": "/public/{filename}",
+            "health": "/health"
         }
     }
 
-@app.get("/public/{filename}")
-async def get_file(filename: str):
-    file_path = os.path.join(PUBLIC_DIR, filename)
-    
-    if os.path.exists(file_path):
-        return FileResponse(file_path)
-    
-    return {"error": "Файл не найден"} 
+@app.get("/health")
+async def health():
+    # Состояние пулов соединений: занятые/свободные соединения и время ожидания
+    database_status = "ok"
+    try:
+        await AsyncDatabase.execute_query("SELECT 1")
+    except Exception:
+        database_status = "unavailable"
+
+    content = {
+        "status": database_status,
+        "database": {
+            "pool": Database.stats(),
+            "async_pool": AsyncDatabase.stats()
+        },
+        "cache": cache_stats(),
+        "storage": {"public": public_store.stats()},
+        "render": {
+            "requests": generation_flight.stats(),
+            "in_flight": get_diploma_service().in_flight.stats(),
+            "locks": get_diploma_service().render_lock.stats()
+        },
+        "statements": statement_registry.stats()
+    }
+    status_code = 200 if database_status == "ok" else 503
+    return JSONResponse(content=content, status_code=status_code)
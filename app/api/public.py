@@ -0,0 +1,81 @@
+import os
+import stat
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import FileResponse, Response
+from ..core.pdf_config import STORAGE_CONFIG
+from ..core.retention import FileStore
+
+router = APIRouter(prefix="/public", tags=["public"])
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PUBLIC_DIR = os.path.join(SCRIPT_DIR, "public")
+
+# Имена опубликованных файлов содержат ключ содержимого, поэтому файл под
+# одним именем не меняется; клиент всё равно проверяет его через If-None-Match
+PUBLIC_CACHE_CONTROL = "public, max-age=86400"
+
+os.makedirs(PUBLIC_DIR, exist_ok=True)
+
+# Опубликованные файлы лежат в подкаталогах по хешу имени, ссылка — по-прежнему /public/{имя}
+public_store = FileStore(
+    PUBLIC_DIR,
+    max_age=STORAGE_CONFIG['public_max_age'],
+    max_bytes=STORAGE_CONFIG['public_max_bytes'],
+    shard_levels=STORAGE_CONFIG['shard_levels']
+)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match: список тегов через запятую или "*".
+    Слабые теги (W/"...") сравниваются по значению.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def public_path(filename: str) -> Optional[str]:
+    """
+    Returns:
+        str: Путь к опубликованному файлу или None, если имя недопустимо или файла нет
+    """
+    if not filename or filename.startswith(".") or os.path.basename(filename) != filename:
+        return None
+    return public_store.lookup(filename)
+
+@router.get("/{filename}")
+async def get_file(filename: str, if_none_match: Optional[str] = Header(None)):
+    file_path = public_path(filename)
+    try:
+        stat_result = os.stat(file_path) if file_path else None
+    except OSError:
+        # Файл удалён в обход индекса (например, очисткой в другом процессе)
+        public_store.forget(filename)
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Файл не найден"
+        )
+
+    # FileResponse сам выставляет ETag, Last-Modified и отдаёт диапазоны по Range
+    response = FileResponse(
+        file_path,
+        stat_result=stat_result,
+        headers={"Cache-Control": PUBLIC_CACHE_CONTROL}
+    )
+    etag = response.headers["etag"]
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL}
+        )
+    return response
@@ -1,17 +1,69 @@
+import io
 import os
+import shutil
+import tempfile
+from concurrent.futures import as_completed
 from datetime import datetime
 from .excel_core import ExcelCore
-import openpyxl
 from openpyxl.drawing.image import Image as ExcelImage
+from PIL import Image as PILImage
 from .pdf_service import PDFService 
-from ..models.diploma_repository import DiplomaRepository
+from .pdf_cache import PDFResultCache
+from .pdf_config import PDF_CONFIG, PDF_CACHE_CONFIG, RENDER_CONFIG
+from .xlsx_patch import XlsxPatchTemplate
+from .process_pool import WarmProcessPool
+from .single_flight import SingleFlight, FileLockSingleFlight
+from .pdf_native import NativePDFRenderer, NativeRenderError, layout_matches
+from .storage import write_atomic
+from . import layout, styles
+from ..models.cached_repository import CachedDiplomaRepository
 from dotenv import load_dotenv
 
 load_dotenv()
 
+LOGO_SIZE = (150, 90)
+
+# Путь к логотипу -> ((mtime, размер файла), PNG в размере вставки)
+_logo_cache = {}
+
+def _logo_png(logo_path: str) -> bytes:
+    """
+    Логотип, уменьшенный до размера вставки. Декодируется один раз на процесс
+    и заново только при изменении файла.
+    """
+    path = os.path.abspath(logo_path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _logo_cache.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    scale = max(1, RENDER_CONFIG['logo_scale'])
+    with PILImage.open(path) as image:
+        resized = image.convert("RGBA").resize(
+            (LOGO_SIZE[0] * scale, LOGO_SIZE[1] * scale), PILImage.LANCZOS
+        )
+    buffer = io.BytesIO()
+    resized.save(buffer, format="PNG")
+    data = buffer.getvalue()
+    _logo_cache[path] = (version, data)
+    return data
+
+def _short_name(full_name: str) -> str:
+    """
+    Фамилия и инициалы: "Иванов Иван Иванович" -> "Иванов И.И."
+    """
+    name_parts = full_name.split()
+    if len(name_parts) >= 2:
+        initials = "".join([part[0] + "." for part in name_parts[1:]])
+        return f"{name_parts[0]} {initials}"
+    return full_name
+
 class BaseExcelGenerator:
-    def __init__(self, template_path: str = None, logo_path: str = None):
+    def __init__(self, template_path: str = None, logo_path: str = None,
+                 render_engine: str = "openpyxl"):
         self.logo_path = logo_path
+        self.render_engine = render_engine
         self.template_path = self._find_template(template_path)
         
     def _find_template(self, template_path: str, default_name: str = None) -> str:
@@ -31,58 +83,39 @@ class BaseExcelGenerator:
             return
             
         worksheet = excel.sheet
-        img = ExcelImage(self.logo_path)
-        img.width = 150
-        img.height = 90
+        img = ExcelImage(io.BytesIO(_logo_png(self.logo_path)))
+        img.width, img.height = LOGO_SIZE
         worksheet.add_image(img, cell_address)
         
+        workbook_styles = styles.WorkbookStyles(excel.workbook)
         for row in range(1, 10):
             for col in range(1, 10):
-                cell = worksheet.cell(row=row, column=col)
-                cell.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center')
-    
-    def _adjust_column_widths(self, excel: ExcelCore, max_column_width: int = 40):
-        for column in excel.sheet.columns:
-            max_length = 0
-            column_letter = openpyxl.utils.get_column_letter(column[0].column)
-
-            for cell in column:
-                if cell.value:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-
-            adjusted_width = min(max_column_width, (max_length + 2) * 1.2)
-            excel.sheet.column_dimensions[column_letter].width = adjusted_width
+                workbook_styles.apply(worksheet.cell(row=row, column=col), alignment=styles.ALIGN_CENTER)
     
-    def _adjust_row_heights(self, excel: ExcelCore, header_rows: tuple = None, min_height: int = 20):
-        for row in excel.sheet.rows:
-            if header_rows and header_rows[0] <= row[0].row <= header_rows[1]:
-                continue
-                
-            max_height = 0
-            for cell in row:
-                if cell.value:
-                    cell_text = str(cell.value)
-                    col_letter = openpyxl.utils.get_column_letter(cell.column)
-                    col_width = excel.sheet.column_dimensions[col_letter].width
-
-                    chars_per_line = int(col_width / 1.2)
-                    if chars_per_line <= 0:
-                        chars_per_line = 1
-                    
-                    lines = 0
-                    for line in cell_text.split('\n'):
-                        lines += max(1, len(line) // chars_per_line + (1 if len(line) % chars_per_line > 0 else 0))
-                    
-                    row_height = lines * 15  # 15 пикселей на строку
-                    if row_height > max_height:
-                        max_height = row_height
-            
-            if max_height > 0:
-                excel.sheet.row_dimensions[row[0].row].height = max(min_height, max_height)
+    def _apply_layout(self, excel: ExcelCore, max_column_width: float, header_rows: tuple = None,
+                      min_height: int = 20, column_widths: dict = None, row_heights: dict = None):
+        layout.apply_layout(excel.sheet, max_column_width, header_rows, min_height,
+                            column_widths, row_heights)
+
+    def _apply_styles(self, excel: ExcelCore):
+        pass
+
+    def _render_patched(self, values: dict, max_column_width: float,
+                        header_rows: tuple = None, min_height: int = 20,
+                        column_widths: dict = None, row_heights: dict = None) -> bytes:
+        if self.render_engine != "patch" or not self.template_path or not os.path.exists(self.template_path):
+            return None
+        try:
+            return XlsxPatchTemplate.for_generator(self).render(
+                values, max_column_width, header_rows, min_height, column_widths, row_heights
+            )
+        except Exception as e:
+            print(f"Ошибка быстрого рендеринга, используется openpyxl: {e}")
+            return None
+
+    @staticmethod
+    def _write_file(output_path: str, data: bytes) -> str:
+        return write_atomic(output_path, data)
 
     def _check_diploma_eligibility(self, assignments_results: list) -> tuple:
         if not assignments_results:
@@ -95,8 +128,9 @@ class BaseExcelGenerator:
 
 
 class DiplomaGenerator(BaseExcelGenerator):  
-    def __init__(self, template_path: str = None, logo_path: str = None):
-        super().__init__(template_path, logo_path)
+    def __init__(self, template_path: str = None, logo_path: str = None,
+                 render_engine: str = "openpyxl"):
+        super().__init__(template_path, logo_path, render_engine)
         self.template_path = self._find_template(template_path, "diploma.xlsx")
         # if not self.template_path and os.getenv("DEBUG") == "True":
         #     print("Предупреждение: Шаблон диплома не найден. Будет создан простой диплом.")
@@ -106,159 +140,356 @@ class DiplomaGenerator(BaseExcelGenerator):
     def _add_logo(self, excel: ExcelCore):
         super()._add_logo(excel, 'D1')
     
+    def _apply_styles(self, excel: ExcelCore):
+        workbook_styles = styles.WorkbookStyles(excel.workbook)
+        for row in excel.sheet.rows:
+            for cell in row:
+                if 6 <= cell.row <= 8 and 3 <= cell.column <= 7:
+                    workbook_styles.apply(cell, alignment=styles.ALIGN_CENTER)
+                elif (cell.row, cell.column) in ((11, 5), (13, 5), (15, 7)):
+                    workbook_styles.apply(cell, styles.FONT_REGULAR, styles.ALIGN_RIGHT_WRAP)
+                else:
+                    workbook_styles.apply(cell, styles.FONT_REGULAR, styles.ALIGN_CENTER_WRAP)
+    
     def generate_diploma(self, student_data: dict, topic_name: str, 
                          assignments_results: list, output_path: str = None) -> str:
+        data = self.render_diploma(student_data, topic_name, assignments_results)
+        
+        if not output_path:
+            # Имя по ключу содержимого: одинаковые данные дают тот же файл, разные не пересекаются
+            student_name_file = student_data.get('full_name', '').replace(' ', '_')
+            key = PDFResultCache.make_key(student_data, topic_name, assignments_results)
+            output_path = f"diploma_{student_name_file}_{key[:16]}.xlsx"
+        
+        return self._write_file(output_path, data)
+    
+    def render_diploma(self, student_data: dict, topic_name: str, 
+                       assignments_results: list) -> bytes:
         eligible, with_honors = self._check_diploma_eligibility(assignments_results)
         if not eligible:
             raise ValueError("Студент не имеет права на получение диплома. "
                              "Все задания должны быть выполнены с оценкой не ниже 3.")
         
-        if self.template_path and os.path.exists(self.template_path):
-            excel = ExcelCore(self.template_path)
-        else:
-            excel = ExcelCore()
-            excel.create_sheet("Диплом")
-        
-        self._add_logo(excel)
-
         student_name = student_data.get('full_name', '')
-        excel.set_value("E11", student_name)
-        excel.set_value("E13", topic_name)
-        
         avg_score = sum(result.get("score", 0) for result in assignments_results) / len(assignments_results)
-        excel.set_value("G15", f"{avg_score:.1f}")
+        values = {
+            "E11": student_name,
+            "E13": topic_name,
+            "G15": f"{avg_score:.1f}"
+        }
         
         if with_honors:
             pass
-        
-        if not output_path:
-            student_name_file = student_data.get('full_name', '').replace(' ', '_')
-            output_path = f"diploma_{student_name_file}_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
 
-        for row in excel.sheet.rows:
-            for cell in row:
-                if 6 <= cell.row <= 8 and 3 <= cell.column <= 7:
-                    cell.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center')
-                elif (cell.row == 11 and cell.column == 5) or (cell.row == 13 and cell.column == 5) or (cell.row == 15 and cell.column == 7):
-                    cell.font = openpyxl.styles.Font(size=12)
-                    cell.alignment = openpyxl.styles.Alignment(horizontal='right', vertical='center', wrap_text=True)
-                else:
-                    cell.font = openpyxl.styles.Font(size=12)
-                    cell.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center', wrap_text=True)
+        data = self._render_patched(values, 40, (6, 8))
+        if data is not None:
+            return data
+
+        if self.template_path and os.path.exists(self.template_path):
+            excel = ExcelCore.from_template(self.template_path)
+        else:
+            excel = ExcelCore()
+            excel.create_sheet("Диплом")
+        
+        self._add_logo(excel)
+        for cell, value in values.items():
+            excel.set_value(cell, value)
+        self._apply_styles(excel)
         
-        self._adjust_column_widths(excel)
-        self._adjust_row_heights(excel, (6, 8))
+        self._apply_layout(excel, 40, (6, 8))
         
-        excel.save(output_path)
-        return output_path
+        return excel.to_bytes()
 
 
 class DiplomaAppendixGenerator(BaseExcelGenerator):    
-    def __init__(self, template_path: str = None, logo_path: str = None):
-        super().__init__(template_path, logo_path)
+    def __init__(self, template_path: str = None, logo_path: str = None,
+                 render_engine: str = "openpyxl"):
+        super().__init__(template_path, logo_path, render_engine)
         self.template_path = self._find_template(template_path, "diploma-addition.xlsx")
             
     def _add_logo(self, excel: ExcelCore):
         super()._add_logo(excel, 'C1')
     
+    def _apply_styles(self, excel: ExcelCore):
+        workbook_styles = styles.WorkbookStyles(excel.workbook)
+        for row in excel.sheet.rows:
+            for cell in row:
+                if 6 <= cell.row <= 8 and 2 <= cell.column <= 6:
+                    workbook_styles.apply(cell, alignment=styles.ALIGN_CENTER)
+                elif cell.row >= 13:
+                    workbook_styles.apply(cell, styles.FONT_REGULAR, styles.ALIGN_CENTER_WRAP)
+                else:
+                    workbook_styles.apply(cell, styles.FONT_REGULAR)
+    
     def generate_appendix(self, student_data: dict, topic_name: str, 
                           assignments_results: list, output_path: str = None,
                           issued_by: str = "Выдано") -> str:
-        if self.template_path and os.path.exists(self.template_path):
-            excel = ExcelCore(self.template_path)
-        else:
-            excel = ExcelCore()
-            excel.create_sheet("Приложение к диплому")
-
-        self._add_logo(excel)
-        excel.set_value("B10", f"Результаты по теме: {topic_name}")
-        excel.set_value("B13", "№")
-        excel.set_value("C13", "Название задания")
-        excel.set_value("D13", "Оценка")
-        excel.set_value("E13", "Время (мин)")
+        data = self.render_appendix(student_data, topic_name, assignments_results, issued_by)
+        
+        if not output_path:
+            student_name_file = student_data.get('full_name', '').replace(' ', '_')
+            key = PDFResultCache.make_key(student_data, topic_name, assignments_results, issued_by)
+            output_path = f"diploma_appendix_{student_name_file}_{key[:16]}.xlsx"
+        
+        return self._write_file(output_path, data)
+    
+    def render_appendix(self, student_data: dict, topic_name: str, 
+                        assignments_results: list, issued_by: str = "Выдано") -> bytes:
+        values = {
+            "B10": f"Результаты по теме: {topic_name}",
+            "B13": "№",
+            "C13": "Название задания",
+            "D13": "Оценка",
+            "E13": "Время (мин)"
+        }
         
         total_score = 0
         total_time = 0
         
         for idx, result in enumerate(assignments_results, start=1):
             row = 13 + idx
-            excel.set_value(f"B{row}", idx)
-            excel.set_value(f"C{row}", result.get("name", ""))
-            excel.set_value(f"D{row}", result.get("score", 0))
-            excel.set_value(f"E{row}", result.get("time_spent", 0))
+            values[f"B{row}"] = idx
+            values[f"C{row}"] = result.get("name", "")
+            values[f"D{row}"] = result.get("score", 0)
+            values[f"E{row}"] = result.get("time_spent", 0)
             
             total_score += result.get("score", 0)
             total_time += result.get("time_spent", 0)
         
         summary_row = 14 + len(assignments_results)
-        excel.set_value(f"B{summary_row}", "Итого:")
-        excel.set_value(f"D{summary_row}", total_score)
-        excel.set_value(f"E{summary_row}", total_time)
+        values[f"B{summary_row}"] = "Итого:"
+        values[f"D{summary_row}"] = total_score
+        values[f"E{summary_row}"] = total_time
         
         avg_score = total_score / len(assignments_results) if assignments_results else 0
-        excel.set_value(f"C{summary_row + 1}", f"Средний балл: {avg_score:.1f}")
+        values[f"C{summary_row + 1}"] = f"Средний балл: {avg_score:.1f}"
         
         signature_row = summary_row + 3
         
-        full_name = student_data.get('full_name', '')
-        initials = ""
-        if full_name:
-            name_parts = full_name.split()
-            if len(name_parts) >= 2:
-                surname = name_parts[0]
-                initials = "".join([part[0] + "." for part in name_parts[1:]])
-                full_name_short = f"{surname} {initials}"
-            else:
-                full_name_short = full_name
-        else:
-            full_name_short = ""
+        full_name_short = _short_name(student_data.get('full_name', ''))
         
-        excel.set_value(f"B{signature_row}", f"{issued_by}")
-        excel.set_value(f"C{signature_row}", full_name_short)
+        values[f"B{signature_row}"] = f"{issued_by}"
+        values[f"C{signature_row}"] = full_name_short
         underline = "_" * 6
-        excel.set_value(f"D{signature_row}", underline)
+        values[f"D{signature_row}"] = underline
         
         current_date = datetime.now().strftime("%d.%m.%Y")
-        excel.set_value(f"E{signature_row}", current_date)
-        
-        if not output_path:
-            student_name_file = student_data.get('full_name', '').replace(' ', '_')
-            output_path = f"diploma_appendix_{student_name_file}_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
+        values[f"E{signature_row}"] = current_date
 
-        for row in excel.sheet.rows:
-            for cell in row:
-                if 6 <= cell.row <= 8 and 2 <= cell.column <= 6:
-                    cell.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center')
-                else:
-                    cell.font = openpyxl.styles.Font(size=12)
-                    if row[0].row >= 13:
-                        cell.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center', wrap_text=True)
+        task_rows = range(14, 14 + len(assignments_results))
+        data = self._render_patched(values, 20, (6, 8), 25,
+                                    column_widths={3: 20},
+                                    row_heights={row_idx: 75 for row_idx in task_rows})
+        if data is not None:
+            return data
 
-        self._adjust_column_widths(excel, 20)
-        excel.sheet.column_dimensions['C'].width = 20 
-        
-        self._adjust_row_heights(excel, (6, 8), 25)
-        
-        for row_idx in range(14, 14 + len(assignments_results)):
-            excel.sheet.row_dimensions[row_idx].height = 75
+        if self.template_path and os.path.exists(self.template_path):
+            excel = ExcelCore.from_template(self.template_path)
+        else:
+            excel = ExcelCore()
+            excel.create_sheet("Приложение к диплому")
+
+        self._add_logo(excel)
+        for cell, value in values.items():
+            excel.set_value(cell, value)
+        self._apply_styles(excel)
+
+        self._apply_layout(excel, 20, (6, 8), 25,
+                           column_widths={3: 20},
+                           row_heights={row_idx: 75 for row_idx in task_rows})
         
-        excel.save(output_path)
-        return output_path
+        return excel.to_bytes()
+
+
+# Генераторы процесса пула рендеринга, создаются и прогреваются один раз при его запуске
+_worker_generators = {}
+
+def _init_render_worker(diploma_template: str, appendix_template: str,
+                        logo_path: str, render_engine: str):
+    _worker_generators["diploma"] = DiplomaGenerator(diploma_template, logo_path, render_engine)
+    _worker_generators["appendix"] = DiplomaAppendixGenerator(appendix_template, logo_path, render_engine)
+    try:
+        if logo_path and os.path.exists(logo_path):
+            _logo_png(logo_path)
+        if render_engine == "patch":
+            for generator in _worker_generators.values():
+                if generator.template_path and os.path.exists(generator.template_path):
+                    XlsxPatchTemplate.for_generator(generator)
+    except Exception as e:
+        print(f"Ошибка прогрева процесса рендеринга: {e}")
+
+
+def _render_document(kind: str, student_data: dict, topic_name: str,
+                     assignments_results: list, issued_by: str) -> bytes:
+    if kind == "diploma":
+        return _worker_generators["diploma"].render_diploma(student_data, topic_name, assignments_results)
+    return _worker_generators["appendix"].render_appendix(student_data, topic_name, assignments_results, issued_by)
+
+
+def _render_documents(job: dict) -> dict:
+    job["documents"] = {
+        kind: _render_document(kind, job["student_data"], job["topic_name"],
+                               job["assignments_results"], job["issued_by"])
+        for kind in ("diploma", "appendix")
+    }
+    return job
 
 
 class DiplomaService:   
     def __init__(self, logo_path: str = None, 
                  diploma_template: str = None, 
-                 appendix_template: str = None):
+                 appendix_template: str = None,
+                 render_engine: str = None,
+                 use_cache: bool = None,
+                 render_workers: int = None):
+        render_engine = render_engine or RENDER_CONFIG['engine']
+        if render_workers is None:
+            render_workers = RENDER_CONFIG['workers'] if RENDER_CONFIG['pool_enabled'] else 0
+        if use_cache is None:
+            use_cache = PDF_CACHE_CONFIG['enabled']
+        self.pdf_cache = PDFResultCache(
+            PDF_CACHE_CONFIG['dir'], PDF_CACHE_CONFIG['max_bytes']
+        ) if use_cache else None
         self.diploma_generator = DiplomaGenerator(
             template_path=diploma_template,
-            logo_path=logo_path
+            logo_path=logo_path,
+            render_engine=render_engine
         )
         
         self.appendix_generator = DiplomaAppendixGenerator(
             template_path=appendix_template,
-            logo_path=logo_path
+            logo_path=logo_path,
+            render_engine=render_engine
         )
+        
+        # Пул процессов рендеринга; без него документы рендерятся в текущем потоке
+        self.render_pool = WarmProcessPool(
+            render_workers,
+            _init_render_worker,
+            (self.diploma_generator.template_path, self.appendix_generator.template_path,
+             logo_path, render_engine)
+        ) if render_workers > 0 else None
+        # Одновременные запросы одного и того же диплома ждут один рендеринг: в процессе —
+        # общий результат, между воркерами — файловая блокировка и общий дисковый кэш PDF
+        self.in_flight = SingleFlight()
+        self.render_lock = FileLockSingleFlight(RENDER_CONFIG['lock_dir'], RENDER_CONFIG['lock_timeout'])
+        
+        # Встроенный рендерер PDF — только для шаблонов, по которым снят его макет
+        # (pdf_native.layout_matches), свои и изменённые шаблоны идут через LibreOffice
+        self.native_enabled = PDF_CONFIG['engine'] == 'native'
+        self._native = None
+    
+    def start(self):
+        """
+        Заранее запускает и прогревает пул процессов рендеринга и встроенный рендерер PDF
+        """
+        if self.render_pool is not None:
+            self.render_pool.start()
+            print(f"Пул рендеринга запущен: {self.render_pool.workers} процессов")
+        # Шрифт и фоны страниц встроенного рендерера готовятся до первого запроса
+        self._native_renderer()
+    
+    def shutdown(self):
+        if self.render_pool is not None:
+            self.render_pool.shutdown()
+    
+    def _native_renderer(self):
+        """
+        Встроенный рендерер PDF; пересоздаётся при смене шаблонов, логотипа или шрифта
+        """
+        if not self.native_enabled:
+            return None
+        version = self._template_version()
+        native = self._native
+        if native is not None and native[0] == version:
+            return native[1]
+        
+        if not layout_matches(self.diploma_generator.template_path, self.appendix_generator.template_path):
+            print("Шаблоны отличаются от макета встроенного рендерера, PDF собирается через LibreOffice")
+            self._native = (version, None)
+            return None
+        
+        logo_path = self.diploma_generator.logo_path
+        try:
+            renderer = NativePDFRenderer(
+                PDF_CONFIG['font_path'],
+                _logo_png(logo_path) if logo_path and os.path.exists(logo_path) else None
+            )
+        except Exception as e:
+            print(f"Встроенный рендеринг PDF недоступен, используется LibreOffice: {e}")
+            self.native_enabled = False
+            return None
+        self._native = (version, renderer)
+        return renderer
+    
+    def render_native_pdfs(self, student_data: dict, topic_name: str,
+                           assignments_results: list, issued_by: str = "Выдано") -> dict:
+        """
+        Рисует PDF диплома и приложения без Excel и LibreOffice
+        
+        Returns:
+            dict: "diploma" и "appendix" -> содержимое PDF или None, если документ
+                  нужно собирать через LibreOffice (свой шаблон, символы вне шрифта)
+        """
+        renderer = self._native_renderer()
+        if renderer is None:
+            return None
+        
+        eligible, with_honors = self._check_diploma_eligibility(assignments_results)
+        if not eligible:
+            raise ValueError("Студент не имеет права на получение диплома. "
+                             "Все задания должны быть выполнены с оценкой не ниже 3.")
+        
+        rows = [
+            (idx, result.get("name", ""), result.get("score", 0), result.get("time_spent", 0))
+            for idx, result in enumerate(assignments_results, start=1)
+        ]
+        total_score = sum(row[2] for row in rows)
+        total_time = sum(row[3] for row in rows)
+        avg_score = total_score / len(rows)
+        full_name = student_data.get('full_name', '')
+        signature = (issued_by, _short_name(full_name), datetime.now().strftime("%d.%m.%Y"))
+        try:
+            return {
+                "diploma": renderer.render_diploma(full_name, topic_name, avg_score),
+                "appendix": renderer.render_appendix(topic_name, rows, total_score, total_time,
+                                                     avg_score, signature)
+            }
+        except NativeRenderError as e:
+            print(f"Встроенный рендеринг PDF невозможен, используется LibreOffice: {e}")
+            return None
+    
+    def render_documents(self, student_data: dict, topic_name: str,
+                         assignments_results: list, issued_by: str = "Выдано") -> dict:
+        """
+        Рендерит Excel диплома и приложения. В пуле процессов оба документа
+        рендерятся одновременно.
+        
+        Returns:
+            dict: "diploma" и "appendix" -> содержимое xlsx
+        """
+        if self.render_pool is None:
+            return {
+                "diploma": self.diploma_generator.render_diploma(
+                    student_data=student_data,
+                    topic_name=topic_name,
+                    assignments_results=assignments_results
+                ),
+                "appendix": self.appendix_generator.render_appendix(
+                    student_data=student_data,
+                    topic_name=topic_name,
+                    assignments_results=assignments_results,
+                    issued_by=issued_by
+                )
+            }
+        
+        futures = {
+            kind: self.render_pool.submit(
+                _render_document, kind, student_data, topic_name, assignments_results, issued_by
+            )
+            for kind in ("diploma", "appendix")
+        }
+        return {kind: future.result() for kind, future in futures.items()}
     
     def _check_diploma_eligibility(self, assignments_results: list) -> tuple:
         return self.diploma_generator._check_diploma_eligibility(assignments_results)
@@ -284,68 +515,120 @@ class DiplomaService:
             return pdf_path
         return excel_path
     
+    def export_many_to_pdf(self, excel_paths: dict) -> dict:
+        """
+        Экспортирует несколько Excel файлов в PDF за одно обращение к конвертеру
+        
+        Args:
+            excel_paths (dict): Путь к Excel файлу -> желаемый путь к PDF (или None)
+            
+        Returns:
+            dict: Путь к Excel файлу -> путь к PDF или None, если экспорт не удался
+        """
+        pdf_service = PDFService(timeout=60)
+        converted = pdf_service.convert_many(list(excel_paths))
+        
+        results = {}
+        for excel_path, output_pdf_path in excel_paths.items():
+            pdf_path = converted.get(excel_path)
+            if not pdf_path or not os.path.exists(pdf_path):
+                results[excel_path] = None
+                continue
+            
+            if output_pdf_path and pdf_path != output_pdf_path:
+                try:
+                    os.rename(pdf_path, output_pdf_path)
+                    pdf_path = output_pdf_path
+                except OSError as e:
+                    print(f"Ошибка при переименовании PDF {pdf_path}: {e}")
+            results[excel_path] = pdf_path
+        return results
+    
     def generate_diploma_with_appendix(self, student_data: dict, topic_name: str, 
                                       assignments_results: list, output_dir: str = None,
-                                      issued_by: str = "Выдано") -> dict:
+                                      issued_by: str = "Выдано", with_excel: bool = True) -> dict:
+        """
+        Генерирует диплом и приложение в файлы Excel и PDF в output_dir.
+        
+        Имена файлов строятся по ключу содержимого, поэтому повторный вызов с теми же
+        данными возвращает уже готовые файлы, а одновременные вызовы не перезаписывают
+        файлы друг друга и объединяются в один рендеринг. С with_excel=False Excel
+        не сохраняется (и не рендерится, если PDF собран встроенным рендерером),
+        пути к Excel в результате равны None.
+        """
         eligible, with_honors = self._check_diploma_eligibility(assignments_results)
         if not eligible:
             raise ValueError("Студент не имеет права на получение диплома. "
                              "Все задания должны быть выполнены с оценкой не ниже 3.")
         
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        
-        student_name_file = student_data.get('full_name', '').replace(' ', '_')
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        
-        if output_dir:
-            diploma_excel_path = os.path.join(output_dir, f"diploma_{student_name_file}_{timestamp}.xlsx")
-            diploma_pdf_path = os.path.join(output_dir, f"diploma_{student_name_file}_{timestamp}.pdf")
-            appendix_excel_path = os.path.join(output_dir, f"diploma_appendix_{student_name_file}_{timestamp}.xlsx")
-            appendix_pdf_path = os.path.join(output_dir, f"diploma_appendix_{student_name_file}_{timestamp}.pdf")
-        else:
-            diploma_excel_path = f"diploma_{student_name_file}_{timestamp}.xlsx"
-            diploma_pdf_path = f"diploma_{student_name_file}_{timestamp}.pdf"
-            appendix_excel_path = f"diploma_appendix_{student_name_file}_{timestamp}.xlsx"
-            appendix_pdf_path = f"diploma_appendix_{student_name_file}_{timestamp}.pdf"
-        
-        self.diploma_generator.generate_diploma(
-            student_data=student_data,
-            topic_name=topic_name,
-            assignments_results=assignments_results,
-            output_path=diploma_excel_path
-        )
-        self.appendix_generator.generate_appendix(
-            student_data=student_data,
-            topic_name=topic_name,
-            assignments_results=assignments_results,
-            output_path=appendix_excel_path,
-            issued_by=issued_by
+        output_dir = output_dir or "."
+        os.makedirs(output_dir, exist_ok=True)
+        key = self.cache_key(student_data, topic_name, assignments_results, issued_by)
+        
+        # Дождавшийся блокировки процесс найдёт готовые файлы в _generate_files
+        return self.in_flight.do(
+            ("files", os.path.abspath(output_dir), key, with_excel),
+            self.render_lock.do,
+            ("files", os.path.abspath(output_dir), key),
+            self._generate_files,
+            student_data, topic_name, assignments_results, output_dir, issued_by, key, with_excel
         )
-       
-        diploma_pdf = None
-        appendix_pdf = None
-        
-        try:
-            diploma_pdf = self.export_to_pdf(diploma_excel_path, diploma_pdf_path)
-        except Exception as e:
-            print(f"Ошибка при экспорте диплома в PDF: {str(e)}")
-        
+    
+    def _generate_files(self, student_data: dict, topic_name: str, assignments_results: list,
+                        output_dir: str, issued_by: str, key: str, with_excel: bool) -> dict:
+        names = self._pdf_names(student_data, key)
+        paths = {}
+        for kind in ("diploma", "appendix"):
+            paths[f"{kind}_pdf"] = os.path.join(output_dir, names[kind])
+            paths[f"{kind}_excel"] = os.path.splitext(paths[f"{kind}_pdf"])[0] + ".xlsx" if with_excel else None
+        if all(os.path.exists(path) for path in paths.values() if path):
+            return paths
+        
+        # Рабочий каталог задания внутри output_dir: LibreOffice пишет только в него,
+        # а готовые файлы переносятся в output_dir атомарным переименованием
+        scratch_dir = tempfile.mkdtemp(prefix=".job_", dir=output_dir)
         try:
-            appendix_pdf = self.export_to_pdf(appendix_excel_path, appendix_pdf_path)
-        except Exception as e:
-            print(f"Ошибка при экспорте приложения в PDF: {str(e)}")
+            # Excel нужен, только если его просили или PDF собирается через LibreOffice
+            native = self.render_native_pdfs(student_data, topic_name, assignments_results, issued_by)
+            excel_paths = {}
+            if with_excel or native is None:
+                documents = self.render_documents(student_data, topic_name, assignments_results, issued_by)
+                excel_paths = {
+                    kind: write_atomic(os.path.join(scratch_dir, f"{kind}.xlsx"), data)
+                    for kind, data in documents.items()
+                }
+            if native is not None:
+                pdf_paths = {
+                    kind: write_atomic(os.path.join(scratch_dir, f"{kind}.pdf"), data)
+                    for kind, data in native.items()
+                }
+            else:
+                converted = self.export_many_to_pdf({path: None for path in excel_paths.values()})
+                pdf_paths = {kind: converted.get(excel_path) for kind, excel_path in excel_paths.items()}
+            
+            for kind in ("diploma", "appendix"):
+                pdf_path = pdf_paths.get(kind)
+                if pdf_path:
+                    os.replace(pdf_path, paths[f"{kind}_pdf"])
+                else:
+                    print(f"Ошибка при экспорте {'диплома' if kind == 'diploma' else 'приложения'} в PDF: "
+                          f"{excel_paths.get(kind)}")
+                    paths[f"{kind}_pdf"] = None
+                if with_excel:
+                    os.replace(excel_paths[kind], paths[f"{kind}_excel"])
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
         
         return {
-            "diploma_excel": diploma_excel_path,
-            "appendix_excel": appendix_excel_path,
-            "diploma_pdf": diploma_pdf,
-            "appendix_pdf": appendix_pdf
+            "diploma_excel": paths["diploma_excel"],
+            "appendix_excel": paths["appendix_excel"],
+            "diploma_pdf": paths["diploma_pdf"],
+            "appendix_pdf": paths["appendix_pdf"]
         }
     
     def generate_diploma_by_diploma_id(self, diploma_id: int, output_dir: str = None, 
-                                      issued_by: str = "Выдано") -> dict:
-        diploma_data = DiplomaRepository.get_diploma_by_id(diploma_id)
+                                      issued_by: str = "Выдано", with_excel: bool = True) -> dict:
+        diploma_data = CachedDiplomaRepository.get_diploma_by_id(diploma_id)
         if not diploma_data:
             raise ValueError(f"Диплом с ID {diploma_id} не найден в базе данных")
         
@@ -374,17 +657,171 @@ class DiplomaService:
             topic_name=topic_name,
             assignments_results=assignments_results,
             output_dir=output_dir,
-            issued_by=issued_by
+            issued_by=issued_by,
+            with_excel=with_excel
         )    
     
     def generate_diploma_by_user_and_topic(self, user_id: int, topic_id: int, 
                                           output_dir: str = None, 
-                                          issued_by: str = "Выдано") -> dict:
-        user_data = DiplomaRepository.get_user_by_id(user_id)
+                                          issued_by: str = "Выдано",
+                                          context: dict = None, with_excel: bool = True) -> dict:
+        """
+        Одновременные вызовы для одной пары (пользователь, тема) выполняются один раз
+        и получают одни и те же файлы
+        """
+        return self.in_flight.do(
+            ("user_topic_files", user_id, topic_id, issued_by, os.path.abspath(output_dir or "."), with_excel),
+            self._generate_by_user_and_topic,
+            user_id, topic_id, output_dir, issued_by, context, with_excel
+        )
+
+    def _generate_by_user_and_topic(self, user_id: int, topic_id: int, output_dir: str,
+                                    issued_by: str, context: dict, with_excel: bool) -> dict:
+        student_data, topic_name, assignments_results = self._load_user_and_topic(user_id, topic_id, context)
+
+        return self.generate_diploma_with_appendix(
+            student_data=student_data,
+            topic_name=topic_name,
+            assignments_results=assignments_results,
+            output_dir=output_dir,
+            issued_by=issued_by,
+            with_excel=with_excel
+        )
+
+    def render_pdfs(self, student_data: dict, topic_name: str, 
+                    assignments_results: list, issued_by: str = "Выдано") -> dict:
+        """
+        Генерирует диплом и приложение в памяти, без промежуточных файлов.
+        Готовые PDF берутся из кэша, если такой же диплом уже собирался.
+        
+        Returns:
+            dict: "diploma" и "appendix" -> содержимое PDF или None, если экспорт не удался
+        """
+        key = self.cache_key(student_data, topic_name, assignments_results, issued_by)
+        if self.pdf_cache is not None:
+            self.pdf_cache.check_version(self._template_version())
+            cached = self.pdf_cache.get(key, ("diploma", "appendix"))
+            if cached:
+                return cached
+        
+        return self.in_flight.do(
+            ("pdfs", key),
+            self._render_pdfs_once,
+            student_data, topic_name, assignments_results, issued_by, key
+        )
+
+    def _render_pdfs_once(self, student_data: dict, topic_name: str,
+                          assignments_results: list, issued_by: str, key: str) -> dict:
+        # Другой воркер мог отрендерить этот диплом, пока мы ждали блокировку
+        check = None
+        if self.pdf_cache is not None:
+            check = lambda: self.pdf_cache.get(key, ("diploma", "appendix"))
+        return self.render_lock.do(
+            ("pdfs", key),
+            self._render_pdfs,
+            student_data, topic_name, assignments_results, issued_by, key,
+            check=check
+        )
+
+    def _render_pdfs(self, student_data: dict, topic_name: str,
+                     assignments_results: list, issued_by: str, key: str) -> dict:
+        pdfs = self.render_native_pdfs(student_data, topic_name, assignments_results, issued_by)
+        if pdfs is None:
+            documents = self.render_documents(student_data, topic_name, assignments_results, issued_by)
+            pdf_service = PDFService(timeout=60)
+            pdfs = pdf_service.convert_many_bytes(documents)
+        
+        if pdfs.get("diploma") is None:
+            print("Ошибка при экспорте диплома в PDF")
+        if pdfs.get("appendix") is None:
+            print("Ошибка при экспорте приложения в PDF")
+        if self.pdf_cache is not None and all(content is not None for content in pdfs.values()):
+            self.pdf_cache.put(key, pdfs)
+        return pdfs
+
+    def render_pdfs_by_user_and_topic(self, user_id: int, topic_id: int, 
+                                      issued_by: str = "Выдано", context: dict = None) -> dict:
+        """
+        Args:
+            context (dict): Уже загруженный CachedDiplomaRepository.load_diploma_context результат
+            
+        Returns:
+            dict: "diploma" и "appendix" -> (имя PDF файла, содержимое PDF или None)
+        """
+        return self.in_flight.do(
+            ("user_topic_pdfs", user_id, topic_id, issued_by),
+            self._render_pdfs_by_user_and_topic,
+            user_id, topic_id, issued_by, context
+        )
+
+    def _render_pdfs_by_user_and_topic(self, user_id: int, topic_id: int,
+                                       issued_by: str, context: dict) -> dict:
+        student_data, topic_name, assignments_results = self._load_user_and_topic(user_id, topic_id, context)
+        pdfs = self.render_pdfs(student_data, topic_name, assignments_results, issued_by)
+        
+        names = self._pdf_names(
+            student_data, self.cache_key(student_data, topic_name, assignments_results, issued_by)
+        )
+        return {kind: (names[kind], pdfs[kind]) for kind in ("diploma", "appendix")}
+
+    def pdf_key_by_user_and_topic(self, user_id: int, topic_id: int,
+                                  issued_by: str = "Выдано", context: dict = None) -> str:
+        """
+        Ключ содержимого PDF без рендеринга: совпадает с ключом в именах файлов
+        render_pdfs_by_user_and_topic
+        """
+        student_data, topic_name, assignments_results = self._load_user_and_topic(user_id, topic_id, context)
+        return self.cache_key(student_data, topic_name, assignments_results, issued_by)
+
+    def _template_version(self) -> list:
+        version = []
+        for path in (self.diploma_generator.template_path,
+                     self.appendix_generator.template_path,
+                     self.diploma_generator.logo_path):
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                version.append([os.path.abspath(path), stat.st_mtime_ns, stat.st_size])
+            else:
+                version.append(None)
+        version.append(RENDER_CONFIG['logo_scale'])
+        if self.native_enabled:
+            font_path = PDF_CONFIG['font_path']
+            stat = os.stat(font_path) if os.path.exists(font_path) else None
+            version.append(["native", font_path, stat.st_mtime_ns if stat else None])
+        return version
+
+    def cache_key(self, student_data: dict, topic_name: str, 
+                  assignments_results: list, issued_by: str) -> str:
+        """
+        Ключ содержимого диплома: данные студента, тема, результаты, подпись,
+        версии шаблонов и дата выдачи (она печатается в приложении)
+        """
+        return PDFResultCache.make_key(
+            student_data,
+            topic_name,
+            assignments_results,
+            issued_by,
+            self._template_version(),
+            datetime.now().strftime("%d.%m.%Y")
+        )
+
+    @staticmethod
+    def _pdf_names(student_data: dict, key: str) -> dict:
+        student_name_file = student_data.get('full_name', '').replace(' ', '_')
+        return {
+            "diploma": f"diploma_{student_name_file}_{key[:16]}.pdf",
+            "appendix": f"diploma_appendix_{student_name_file}_{key[:16]}.pdf"
+        }
+
+    def _load_user_and_topic(self, user_id: int, topic_id: int, context: dict = None) -> tuple:
+        if context is None:
+            context = CachedDiplomaRepository.load_diploma_context(user_id, topic_id)
+
+        user_data = context["user"]
         if not user_data:
             raise ValueError(f"Пользователь с ID {user_id} не найден в базе данных")
 
-        topic_data = DiplomaRepository.get_topic_by_id(topic_id)
+        topic_data = context["topic"]
         if not topic_data:
             raise ValueError(f"Тема с ID {topic_id} не найдена в базе данных")
         
@@ -394,17 +831,7 @@ class DiplomaService:
         }
         
         topic_name = topic_data["title"]
-        assignments_results = []
-        performed_tasks = DiplomaRepository.get_performed_tasks_by_user_id(user_id)
-        if performed_tasks:
-            for task in performed_tasks:
-                if task.get("grade") is not None:
-                    task_data = {
-                        "name": f"Задание {task.get('task_id', 'б/н')}", 
-                        "score": task.get("grade", 0),
-                        "time_spent": 0
-                    }
-                    assignments_results.append(task_data)
+        assignments_results = self._tasks_to_assignments(context["tasks"])
         
         if not assignments_results:
             if os.getenv("DEBUG") == "True":
@@ -416,11 +843,171 @@ class DiplomaService:
             else:
                 raise AttributeError("Нет информации о результатах для диплома")
 
-        return self.generate_diploma_with_appendix(
-            student_data=student_data,
-            topic_name=topic_name,
-            assignments_results=assignments_results,
-            output_dir=output_dir,
-            issued_by=issued_by
-        )    
-    
\ No newline at end of file
+        return student_data, topic_name, assignments_results
+
+    @staticmethod
+    def _tasks_to_assignments(performed_tasks: list) -> list:
+        assignments_results = []
+        for task in performed_tasks or []:
+            if task.get("grade") is not None:
+                assignments_results.append({
+                    "name": f"Задание {task.get('task_id', 'б/н')}", 
+                    "score": task.get("grade", 0),
+                    "time_spent": 0
+                })
+        return assignments_results
+
+    def load_batch(self, topic_id: int, user_ids: list = None) -> dict:
+        """
+        Загружает данные для пакетной генерации дипломов несколькими запросами к БД
+        
+        Args:
+            topic_id (int): ID темы
+            user_ids (list): ID пользователей; если не указаны, берутся все допущенные к диплому
+            
+        Returns:
+            dict: Тема, список студентов для генерации и список пропущенных пользователей
+        """
+        topic_data = CachedDiplomaRepository.get_topic_by_id(topic_id)
+        if not topic_data:
+            raise ValueError(f"Тема с ID {topic_id} не найдена в базе данных")
+        
+        if user_ids is None:
+            user_ids = CachedDiplomaRepository.get_eligible_user_ids_by_topic(topic_id)
+        user_ids = list(dict.fromkeys(user_ids))
+        
+        users = CachedDiplomaRepository.get_users_by_ids(user_ids) if user_ids else {}
+        tasks = CachedDiplomaRepository.get_performed_tasks_by_user_ids(user_ids, topic_id=topic_id) if user_ids else {}
+        
+        students = []
+        skipped = []
+        for user_id in user_ids:
+            user_data = users.get(user_id)
+            if not user_data:
+                skipped.append({"user_id": user_id, "error": f"Пользователь с ID {user_id} не найден в базе данных"})
+                continue
+            
+            assignments_results = self._tasks_to_assignments(tasks.get(user_id))
+            eligible, _ = self._check_diploma_eligibility(assignments_results)
+            if not eligible:
+                skipped.append({"user_id": user_id, "error": "Студент не имеет права на получение диплома"})
+                continue
+            
+            students.append({
+                "user_id": user_id,
+                "student_data": {
+                    "full_name": user_data["full_name"],
+                    "email": user_data["email"]
+                },
+                "assignments_results": assignments_results
+            })
+        
+        return {"topic": topic_data, "students": students, "skipped": skipped}
+
+    def _render_jobs(self, jobs: list):
+        """
+        Рендерит задания пакета и выдаёт пары (задание, задание с documents или исключение)
+        по мере готовности
+        """
+        if self.render_pool is None:
+            for job in jobs:
+                try:
+                    job["documents"] = self.render_documents(
+                        job["student_data"], job["topic_name"], job["assignments_results"], job["issued_by"]
+                    )
+                    yield job, job
+                except Exception as e:
+                    yield job, e
+            return
+        
+        futures = {self.render_pool.submit(_render_documents, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+    def generate_batch(self, batch: dict, issued_by: str = "Выдано"):
+        """
+        Генерирует дипломы для набора студентов: Excel рендерится в пуле процессов,
+        PDF конвертируется пакетами. Возвращает генератор событий прогресса;
+        событие converted содержит готовые PDF в памяти (files: вид -> (имя файла, содержимое)).
+        """
+        topic_name = batch["topic"]["title"]
+        students = batch["students"]
+        total = len(students)
+        
+        yield {"event": "started", "total": total, "skipped": len(batch["skipped"])}
+        for item in batch["skipped"]:
+            yield {"event": "skipped", "userId": item["user_id"], "error": item["error"]}
+        
+        if self.pdf_cache is not None:
+            self.pdf_cache.check_version(self._template_version())
+        
+        jobs = []
+        converted = 0
+        for student in students:
+            key = self.cache_key(student["student_data"], topic_name, student["assignments_results"], issued_by)
+            names = self._pdf_names(student["student_data"], key)
+            cached = self.pdf_cache.get(key, ("diploma", "appendix")) if self.pdf_cache is not None else None
+            if not cached:
+                try:
+                    cached = self.render_native_pdfs(
+                        student["student_data"], topic_name, student["assignments_results"], issued_by
+                    )
+                except ValueError:
+                    cached = None
+                if cached and self.pdf_cache is not None:
+                    self.pdf_cache.put(key, cached)
+            if cached:
+                converted += 1
+                yield {"event": "converted", "userId": student["user_id"], "done": converted, "total": total,
+                       "files": {kind: (names[kind], cached[kind]) for kind in ("diploma", "appendix")}}
+                continue
+            
+            jobs.append({
+                "user_id": student["user_id"],
+                "student_data": student["student_data"],
+                "topic_name": topic_name,
+                "assignments_results": student["assignments_results"],
+                "issued_by": issued_by,
+                "cache_key": key,
+                "names": names
+            })
+        
+        rendered = []
+        failed = 0
+        for job, result in self._render_jobs(jobs):
+            if isinstance(result, Exception):
+                failed += 1
+                yield {"event": "failed", "userId": job["user_id"], "error": str(result)}
+            else:
+                rendered.append(result)
+                yield {"event": "rendered", "userId": job["user_id"], "done": len(rendered), "total": total}
+        
+        pdf_service = PDFService(timeout=60)
+        batch_size = max(1, PDF_CONFIG['batch_size'] // 2)
+        for start in range(0, len(rendered), batch_size):
+            chunk = rendered[start:start + batch_size]
+            documents = {}
+            for job in chunk:
+                for kind, data in job["documents"].items():
+                    documents[(job["user_id"], kind)] = data
+            pdfs = pdf_service.convert_many_bytes(documents)
+            
+            for job in chunk:
+                files = {
+                    kind: (job["names"][kind], pdfs.get((job["user_id"], kind)))
+                    for kind in ("diploma", "appendix")
+                }
+                if all(data is not None for _, data in files.values()):
+                    if self.pdf_cache is not None:
+                        self.pdf_cache.put(job["cache_key"], {kind: data for kind, (_, data) in files.items()})
+                    converted += 1
+                    yield {"event": "converted", "userId": job["user_id"], "done": converted, "total": total,
+                           "files": files}
+                else:
+                    failed += 1
+                    yield {"event": "failed", "userId": job["user_id"], "error": "Ошибка при экспорте в PDF"}
+        
+        yield {"event": "finished", "total": total, "converted": converted, "failed": failed}
@@ -1,20 +1,36 @@
+import io
 import openpyxl
 from openpyxl.workbook import Workbook
+from .template_cache import TemplateCache
 
 class ExcelCore:
-    def __init__(self, file_path: str = None):
+    def __init__(self, file_path: str = None, workbook: Workbook = None):
         self.file_path = file_path
-        if file_path:
+        if workbook is not None:
+            self.workbook = workbook
+        elif file_path:
             self.workbook = openpyxl.load_workbook(file_path)
         else:
             self.workbook = Workbook()
         self.sheet = self.workbook.active
 
-    def save(self, file_path: str = None):
-        path = file_path if file_path else self.file_path
-        if not path:
+    @classmethod
+    def from_template(cls, template_path: str):
+        return cls(template_path, workbook=TemplateCache.get_workbook(template_path))
+
+    def save(self, file_path=None):
+        """
+        Сохраняет книгу по пути или в файловый объект (например, io.BytesIO)
+        """
+        target = file_path if file_path is not None else self.file_path
+        if not target:
             raise ValueError("Не указан путь для сохранения файла")
-        self.workbook.save(path)
+        self.workbook.save(target)
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        self.workbook.save(buffer)
+        return buffer.getvalue()
 
     def set_value(self, cell: str, value):
         self.sheet[cell] = value
@@ -0,0 +1,73 @@
+import uuid
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueue:
+    """
+    Фоновая очередь заданий поверх пула потоков с ограниченной конкурентностью.
+
+    Завершённые задания хранятся ttl секунд, после чего удаляются из памяти.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, max_workers: int = 2, ttl: int = 3600):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="diploma-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs) -> str:
+        self._cleanup()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": self.QUEUED,
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None
+            }
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> dict:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, func, args, kwargs):
+        self._update(job_id, status=self.RUNNING, started_at=time.time())
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            self._update(job_id, status=self.FAILED, error=error, finished_at=time.time())
+        else:
+            self._update(job_id, status=self.DONE, result=result, finished_at=time.time())
+
+    def _cleanup(self):
+        expire_before = time.time() - self.ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] and job["finished_at"] < expire_before
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,80 @@
+from openpyxl.utils import get_column_letter
+
+# Ширина одного символа в единицах ширины столбца и высота строки текста
+CHAR_WIDTH = 1.2
+LINE_HEIGHT = 15
+
+
+def filled_cells(sheet) -> dict:
+    """
+    Значения заполненных ячеек листа без обхода всего диапазона
+
+    Returns:
+        dict: (строка, столбец) -> значение
+    """
+    return {position: cell.value for position, cell in sheet._cells.items() if cell.value}
+
+
+def column_widths(cell_values: dict, max_column: int, max_column_width: float) -> dict:
+    """
+    Ширина столбца — по самому длинному значению в нём, не больше max_column_width.
+    Рассчитывается для всех столбцов 1..max_column, в том числе пустых.
+    """
+    lengths = {}
+    for (_, col), value in cell_values.items():
+        if value:
+            length = len(str(value))
+            if length > lengths.get(col, 0):
+                lengths[col] = length
+    return {
+        col: min(max_column_width, (lengths.get(col, 0) + 2) * CHAR_WIDTH)
+        for col in range(1, max_column + 1)
+    }
+
+
+def row_heights(cell_values: dict, widths: dict, header_rows: tuple = None, min_height: int = 20) -> dict:
+    """
+    Высота строки — по числу строк текста в самой высокой ячейке при переносе
+    по ширине столбца. Строки заголовка и строки без значений не меняются.
+    """
+    chars_per_line = {col: max(1, int(width / CHAR_WIDTH)) for col, width in widths.items()}
+    lines_by_row = {}
+    for (row, col), value in cell_values.items():
+        if not value or (header_rows and header_rows[0] <= row <= header_rows[1]):
+            continue
+
+        per_line = chars_per_line[col]
+        text = str(value)
+        if "\n" in text:
+            lines = sum(max(1, -(-len(line) // per_line)) for line in text.split("\n"))
+        else:
+            lines = max(1, -(-len(text) // per_line))
+        if lines > lines_by_row.get(row, 0):
+            lines_by_row[row] = lines
+    return {row: max(min_height, lines * LINE_HEIGHT) for row, lines in lines_by_row.items()}
+
+
+def apply_layout(sheet, max_column_width: float, header_rows: tuple = None, min_height: int = 20,
+                 forced_widths: dict = None, forced_heights: dict = None):
+    """
+    Задаёт ширины столбцов и высоты строк листа openpyxl за один проход по
+    заполненным ячейкам
+
+    Args:
+        sheet: Лист openpyxl
+        max_column_width (float): Максимальная ширина столбца
+        header_rows (tuple): Диапазон строк заголовка, высота которых не меняется
+        min_height (int): Минимальная высота строки с содержимым
+        forced_widths (dict): Принудительные ширины столбцов (номер -> ширина)
+        forced_heights (dict): Принудительные высоты строк (номер -> высота)
+    """
+    cell_values = filled_cells(sheet)
+    widths = column_widths(cell_values, sheet.max_column, max_column_width)
+    widths.update(forced_widths or {})
+    heights = row_heights(cell_values, widths, header_rows, min_height)
+    heights.update(forced_heights or {})
+
+    for col, width in widths.items():
+        sheet.column_dimensions[get_column_letter(col)].width = width
+    for row, height in heights.items():
+        sheet.row_dimensions[row].height = height
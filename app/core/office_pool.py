@@ -0,0 +1,410 @@
+import os
+import sys
+import queue
+import shutil
+import socket
+import signal
+import atexit
+import logging
+import threading
+import subprocess
+import time
+from functools import lru_cache
+from pathlib import Path
+from .pdf_config import PDF_CONFIG
+
+logger = logging.getLogger('OfficePool')
+
+
+@lru_cache(maxsize=1)
+def _load_uno():
+    uno_path = os.environ.get("UNO_PATH")
+    if uno_path and uno_path not in sys.path:
+        sys.path.append(uno_path)
+    try:
+        import uno
+        from com.sun.star.beans import PropertyValue
+        return uno, PropertyValue
+    except ImportError:
+        return None, None
+
+
+def _find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class OfficeWorker:
+    """
+    Долгоживущий экземпляр LibreOffice в режиме headless с собственным профилем.
+
+    Задания передаются через UNO, если модуль uno доступен в текущем интерпретаторе,
+    иначе через клиент unoconv, подключающийся к тому же сокету.
+    """
+
+    def __init__(self, index: int, binary: str, profile_dir: str, job_timeout: int = 60):
+        self.index = index
+        self.binary = binary
+        self.profile_dir = profile_dir
+        self.job_timeout = job_timeout
+        self.port = None
+        self.process = None
+        self.jobs_done = 0
+        self.started_at = None
+        self._desktop = None
+
+    @property
+    def connection(self) -> str:
+        return f"socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+
+    def start(self, startup_timeout: int = 30):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.port = _find_free_port()
+        cmd = [
+            self.binary,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--norestore",
+            "--nolockcheck",
+            f"-env:UserInstallation={Path(self.profile_dir).as_uri()}",
+            f"--accept={self.connection}"
+        ]
+        logger.info("Запуск воркера LibreOffice #%d на порту %d", self.index, self.port)
+        self.process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        self.jobs_done = 0
+        self._desktop = None
+
+        deadline = time.monotonic() + startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Воркер LibreOffice #{self.index} завершился при запуске "
+                                   f"(код: {self.process.returncode})")
+            if self._port_open():
+                self.started_at = time.time()
+                return
+            time.sleep(0.2)
+
+        self.stop()
+        raise RuntimeError(f"Воркер LibreOffice #{self.index} не запустился за {startup_timeout} сек")
+
+    def stop(self):
+        self._desktop = None
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+                self.process.wait(timeout=10)
+            except (ProcessLookupError, subprocess.TimeoutExpired):
+                try:
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        self.process = None
+        self.started_at = None
+
+    def restart(self, startup_timeout: int = 30):
+        self.stop()
+        self.start(startup_timeout)
+
+    def _port_open(self) -> bool:
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                return True
+        except OSError:
+            return False
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def is_healthy(self) -> bool:
+        return self.is_running() and self._port_open()
+
+    def _get_desktop(self, uno):
+        if self._desktop is None:
+            local_context = uno.getComponentContext()
+            resolver = local_context.ServiceManager.createInstanceWithContext(
+                "com.sun.star.bridge.UnoUrlResolver", local_context
+            )
+            context = resolver.resolve(f"uno:{self.connection}")
+            self._desktop = context.ServiceManager.createInstanceWithContext(
+                "com.sun.star.frame.Desktop", context
+            )
+        return self._desktop
+
+    def convert(self, excel_path: str, pdf_path: str) -> bool:
+        # Старый PDF по тому же пути иначе был бы принят за результат неудачной конвертации
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+        uno, property_value = _load_uno()
+        if uno is not None:
+            self._convert_with_uno(uno, property_value, excel_path, pdf_path)
+        else:
+            self._convert_with_unoconv(excel_path, pdf_path)
+        self.jobs_done += 1
+        return os.path.exists(pdf_path)
+
+    def _kill(self):
+        """
+        Аварийно завершает процесс LibreOffice; воркер перезапускается при следующей выдаче
+        """
+        process = self.process
+        if process is not None and process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def _convert_with_uno(self, uno, property_value, excel_path: str, pdf_path: str):
+        # Вызовы UNO не поддерживают таймаут: зависший LibreOffice завершается
+        # по таймеру, после чего ожидающий вызов падает с ошибкой соединения
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            logger.error("Конвертация в воркере LibreOffice #%d превысила %d сек, процесс завершается",
+                         self.index, self.job_timeout)
+            self._kill()
+
+        watchdog = threading.Timer(self.job_timeout, on_timeout)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            self._store_with_uno(uno, property_value, excel_path, pdf_path)
+        except Exception:
+            if not timed_out.is_set():
+                raise
+        finally:
+            watchdog.cancel()
+        if timed_out.is_set():
+            self._desktop = None
+            raise TimeoutError(f"Конвертация в воркере LibreOffice #{self.index} "
+                               f"превысила {self.job_timeout} сек")
+
+    def _store_with_uno(self, uno, property_value, excel_path: str, pdf_path: str):
+        def prop(name, value):
+            item = property_value()
+            item.Name = name
+            item.Value = value
+            return item
+
+        desktop = self._get_desktop(uno)
+        document = desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(excel_path)),
+            "_blank",
+            0,
+            (prop("Hidden", True), prop("ReadOnly", True))
+        )
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(pdf_path)),
+                (prop("FilterName", "calc_pdf_Export"),)
+            )
+        finally:
+            document.close(True)
+
+    def _convert_with_unoconv(self, excel_path: str, pdf_path: str):
+        cmd = [
+            "unoconv",
+            "--connection", self.connection,
+            "-f", "pdf",
+            "-o", pdf_path,
+            excel_path
+        ]
+        process = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=self.job_timeout,
+            check=False
+        )
+        if process.returncode != 0:
+            stderr = process.stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"unoconv завершился с кодом {process.returncode}: {stderr}")
+
+    def status(self) -> dict:
+        return {
+            "index": self.index,
+            "port": self.port,
+            "pid": self.process.pid if self.process else None,
+            "running": self.is_running(),
+            "jobs_done": self.jobs_done,
+            "started_at": self.started_at
+        }
+
+
+class OfficePool:
+    """
+    Пул долгоживущих экземпляров LibreOffice для конвертации в PDF.
+
+    Воркеры запускаются лениво, проверяются перед выдачей и перезапускаются
+    после ошибки или после max_jobs выполненных заданий.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, size: int = None, max_jobs: int = None, profile_dir: str = None,
+                 binary: str = None, startup_timeout: int = None, acquire_timeout: int = None,
+                 job_timeout: int = None):
+        self.size = size or PDF_CONFIG['pool_size']
+        self.max_jobs = max_jobs or PDF_CONFIG['max_jobs_per_worker']
+        self.binary = binary or PDF_CONFIG['binary']
+        self.startup_timeout = startup_timeout or PDF_CONFIG['startup_timeout']
+        self.acquire_timeout = acquire_timeout or PDF_CONFIG['acquire_timeout']
+        job_timeout = job_timeout or PDF_CONFIG['job_timeout']
+        profile_root = os.path.join(profile_dir or PDF_CONFIG['profile_dir'], f"pool_{os.getpid()}")
+
+        self._profile_root = profile_root
+        self._workers = [
+            OfficeWorker(index, self.binary, os.path.join(profile_root, f"worker_{index}"), job_timeout)
+            for index in range(self.size)
+        ]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._closed = False
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        if not PDF_CONFIG['pool_enabled'] or shutil.which(PDF_CONFIG['binary']) is None:
+            return False
+        uno, _ = _load_uno()
+        return uno is not None or shutil.which("unoconv") is not None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None and cls.is_supported():
+                    cls._instance = cls()
+                    atexit.register(cls._instance.shutdown)
+        return cls._instance
+
+    def acquire(self, timeout: float = None) -> OfficeWorker:
+        if self._closed:
+            raise RuntimeError("Пул LibreOffice остановлен")
+        timeout = self.acquire_timeout if timeout is None else timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Нет свободного воркера LibreOffice за {timeout} сек")
+
+        try:
+            if not worker.is_healthy():
+                if worker.process is not None:
+                    logger.warning("Воркер LibreOffice #%d не отвечает, перезапуск", worker.index)
+                worker.restart(self.startup_timeout)
+        except Exception:
+            self._idle.put(worker)
+            raise
+        return worker
+
+    def release(self, worker: OfficeWorker, failed: bool = False):
+        try:
+            if failed:
+                logger.warning("Воркер LibreOffice #%d перезапускается после ошибки", worker.index)
+                worker.stop()
+            elif worker.jobs_done >= self.max_jobs:
+                logger.info("Воркер LibreOffice #%d выполнил %d заданий, перезапуск",
+                            worker.index, worker.jobs_done)
+                worker.stop()
+        finally:
+            self._idle.put(worker)
+
+    def convert(self, excel_path: str, pdf_path: str) -> bool:
+        worker = self.acquire()
+        failed = False
+        try:
+            return worker.convert(excel_path, pdf_path)
+        except Exception as e:
+            failed = True
+            logger.error("Ошибка конвертации в воркере LibreOffice #%d: %s", worker.index, str(e))
+            return False
+        finally:
+            self.release(worker, failed)
+
+    def convert_many(self, jobs: dict) -> dict:
+        """
+        Конвертирует пакет файлов параллельно на воркерах пула.
+
+        Для каждого воркера (но не больше числа файлов) запускается поток,
+        который получает воркер и забирает файлы из общей очереди, пока она не
+        опустеет, поэтому освободившиеся по ходу пакета воркеры тоже включаются
+        в работу.
+
+        Args:
+            jobs (dict): Путь к Excel файлу -> путь к PDF
+
+        Returns:
+            dict: Путь к Excel файлу -> признак успешной конвертации (в порядке jobs)
+        """
+        pending = queue.Queue()
+        for job in jobs.items():
+            pending.put(job)
+
+        results = {}
+        threads = [
+            threading.Thread(target=self._convert_pending, args=(pending, results), daemon=True)
+            for _ in range(min(self.size, len(jobs)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {excel_path: results.get(excel_path, False) for excel_path in jobs}
+
+    def _convert_pending(self, pending: queue.Queue, results: dict):
+        # Воркер ждём короткими интервалами: если очередь опустела, ждать дальше незачем
+        deadline = time.monotonic() + self.acquire_timeout
+        worker = None
+        while worker is None and not pending.empty():
+            try:
+                worker = self.acquire(timeout=min(0.2, self.acquire_timeout))
+            except TimeoutError:
+                if time.monotonic() >= deadline:
+                    logger.error("Нет свободного воркера LibreOffice за %d сек", self.acquire_timeout)
+                    return
+            except Exception as e:
+                logger.error("Не удалось получить воркер LibreOffice: %s", str(e))
+                return
+        if worker is None:
+            return
+
+        failed = False
+        try:
+            while True:
+                try:
+                    excel_path, pdf_path = pending.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    results[excel_path] = worker.convert(excel_path, pdf_path)
+                except Exception as e:
+                    logger.error("Ошибка конвертации %s в воркере LibreOffice #%d: %s",
+                                 excel_path, worker.index, str(e))
+                    results[excel_path] = False
+                    try:
+                        worker.restart(self.startup_timeout)
+                    except Exception:
+                        failed = True
+                        break
+        finally:
+            self.release(worker, failed)
+
+    def health(self) -> list:
+        return [worker.status() for worker in self._workers]
+
+    def shutdown(self):
+        self._closed = True
+        for worker in self._workers:
+            worker.stop()
+        shutil.rmtree(self._profile_root, ignore_errors=True)
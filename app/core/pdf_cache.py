@@ -0,0 +1,168 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from .storage import write_atomic
+
+
+class PDFResultCache:
+    """
+    Дисковый кэш готовых PDF с адресацией по содержимому.
+
+    Запись — набор PDF одного ключа ({key}.{kind}.pdf). Порядок вытеснения LRU
+    хранится в памяти и восстанавливается при старте по mtime файлов; при
+    превышении max_bytes удаляются самые давно использованные записи. Смена
+    версии шаблонов очищает кэш целиком.
+    """
+
+    VERSION_FILE = "VERSION"
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, kind: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{kind}.pdf")
+
+    def _load_index(self):
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            parts = name.split(".")
+            if len(parts) != 3 or parts[2] != "pdf":
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entry = entries.setdefault(parts[0], {"kinds": [], "size": 0, "mtime": 0})
+            entry["kinds"].append(parts[1])
+            entry["size"] += stat.st_size
+            entry["mtime"] = max(entry["mtime"], stat.st_mtime)
+
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]["mtime"]):
+            self._entries[key] = (tuple(entry["kinds"]), entry["size"])
+            self._total_bytes += entry["size"]
+
+    def _remove(self, key: str):
+        kinds, size = self._entries.pop(key)
+        self._total_bytes -= size
+        for kind in kinds:
+            try:
+                os.remove(self._path(key, kind))
+            except OSError:
+                pass
+
+    def _adopt(self, key: str, kinds: tuple):
+        """
+        Добавляет в индекс запись, которую записал другой процесс с тем же каталогом кэша
+        """
+        size = 0
+        for kind in kinds:
+            try:
+                size += os.stat(self._path(key, kind)).st_size
+            except OSError:
+                return None
+        self._entries[key] = (tuple(kinds), size)
+        self._total_bytes += size
+        return self._entries[key]
+
+    def check_version(self, version):
+        """
+        Очищает кэш, если версия шаблонов изменилась с прошлого вызова (в том числе
+        между перезапусками процесса)
+        """
+        version = json.dumps(version, sort_keys=True, default=str)
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version == self._version:
+                return
+            version_path = os.path.join(self.cache_dir, self.VERSION_FILE)
+            stored = None
+            if os.path.exists(version_path):
+                with open(version_path, encoding="utf-8") as f:
+                    stored = f.read()
+            if stored != version:
+                if stored is not None:
+                    print("Шаблоны изменились, кэш PDF очищен")
+                for key in list(self._entries):
+                    self._remove(key)
+                write_atomic(version_path, version.encode("utf-8"))
+            self._version = version
+
+    def get(self, key: str, kinds: tuple) -> dict:
+        """
+        Returns:
+            dict: Вид документа -> содержимое PDF или None, если записи нет
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._adopt(key, kinds)
+            if entry is None or set(kinds) - set(entry[0]):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        documents = {}
+        try:
+            for kind in kinds:
+                path = self._path(key, kind)
+                with open(path, "rb") as f:
+                    documents[kind] = f.read()
+                os.utime(path)
+        except OSError:
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return documents
+
+    def put(self, key: str, documents: dict):
+        size = 0
+        for kind, content in documents.items():
+            write_atomic(self._path(key, kind), content)
+            size += len(content)
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key][1]
+            self._entries[key] = (tuple(documents), size)
+            self._entries.move_to_end(key)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
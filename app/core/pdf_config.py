@@ -0,0 +1,58 @@
+import os
+import tempfile
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PDF_CONFIG = {
+    'binary': os.environ.get('LIBREOFFICE_BIN', 'libreoffice'),
+    'pool_enabled': os.environ.get('LO_POOL_ENABLED', 'True').lower() == 'true',
+    'pool_size': int(os.environ.get('LO_POOL_SIZE', 2)),
+    'max_jobs_per_worker': int(os.environ.get('LO_MAX_JOBS', 200)),
+    'profile_dir': os.environ.get('LO_PROFILE_DIR', '/tmp/lo_profiles'),
+    'startup_timeout': int(os.environ.get('LO_STARTUP_TIMEOUT', 30)),
+    'acquire_timeout': int(os.environ.get('LO_ACQUIRE_TIMEOUT', 60)),
+    'job_timeout': int(os.environ.get('LO_JOB_TIMEOUT', 60)),
+    'batch_size': int(os.environ.get('LO_BATCH_SIZE', 50)),
+    # native — PDF стандартных шаблонов рисуется без LibreOffice; libreoffice — всё через LibreOffice
+    'engine': os.environ.get('PDF_ENGINE', 'native'),
+    'font_path': os.environ.get('PDF_FONT_PATH', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'),
+    'workspace_dir': os.environ.get(
+        'PDF_WORKSPACE_DIR',
+        '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    )
+}
+
+RENDER_CONFIG = {
+    'workers': int(os.environ.get('RENDER_WORKERS', os.cpu_count() or 1)),
+    # Постоянный прогретый пул процессов для рендеринга; False — рендеринг в потоке запроса
+    'pool_enabled': os.environ.get('RENDER_POOL_ENABLED', 'True').lower() == 'true',
+    'engine': os.environ.get('RENDER_ENGINE', 'patch'),
+    'patch_max_rows': int(os.environ.get('RENDER_PATCH_MAX_ROWS', 300)),
+    # Во сколько раз логотип в пикселях крупнее размера вставки (150×90) — для чёткости при печати
+    'logo_scale': int(os.environ.get('RENDER_LOGO_SCALE', 2)),
+    # Блокировки, через которые воркеры uvicorn не рендерят один и тот же диплом одновременно
+    'lock_dir': os.environ.get('RENDER_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'diploma_render_locks')),
+    'lock_timeout': int(os.environ.get('RENDER_LOCK_TIMEOUT', 120))
+}
+
+PDF_CACHE_CONFIG = {
+    'enabled': os.environ.get('PDF_CACHE_ENABLED', 'True').lower() == 'true',
+    'dir': os.environ.get('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'diploma_pdf_cache')),
+    'max_bytes': int(os.environ.get('PDF_CACHE_MAX_MB', 512)) * 1024 * 1024
+}
+
+# Сроки и объёмы хранения опубликованных (public/) и промежуточных (output/) файлов;
+# 0 — без ограничения
+STORAGE_CONFIG = {
+    'output_dir': os.environ.get(
+        'OUTPUT_DIR',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'output')
+    ),
+    'public_max_age': int(os.environ.get('PUBLIC_MAX_AGE_HOURS', 168)) * 3600,
+    'public_max_bytes': int(os.environ.get('PUBLIC_MAX_MB', 2048)) * 1024 * 1024,
+    'output_max_age': int(os.environ.get('OUTPUT_MAX_AGE_HOURS', 24)) * 3600,
+    'output_max_bytes': int(os.environ.get('OUTPUT_MAX_MB', 1024)) * 1024 * 1024,
+    'shard_levels': int(os.environ.get('PUBLIC_SHARD_LEVELS', 2)),
+    'sweep_interval': int(os.environ.get('STORAGE_SWEEP_INTERVAL', 600))
+}
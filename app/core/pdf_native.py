@@ -0,0 +1,615 @@
+import io
+import os
+import zlib
+import struct
+import hashlib
+import threading
+from PIL import Image as PILImage
+
+# Страница A4 в пунктах и поля шаблонов (как в assets/*.xlsx)
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN_LEFT = 56.7
+MARGIN_RIGHT = 56.7
+MARGIN_TOP = 75.8
+MARGIN_BOTTOM = 56.7
+LEADING = 1.25
+
+# Символы, глифы которых встраиваются в PDF: латиница, кириллица и типографские знаки.
+# Текст с другими символами рендерится через LibreOffice
+CHARSET = (
+    [chr(code) for code in range(0x20, 0x7F)]
+    + [chr(code) for code in range(0xA0, 0x100)]
+    + [chr(code) for code in range(0x400, 0x460)]
+    + list("–—‘’‚“”„…№€")
+)
+
+
+class NativeRenderError(Exception):
+    """
+    Документ нельзя нарисовать встроенным рендерером (символ вне шрифта,
+    текст не помещается в макет); его нужно собрать через LibreOffice
+    """
+
+
+class TrueTypeFont:
+    """
+    Метрики и подмножество шрифта TrueType, нужные для встраивания в PDF
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.path = path
+        num_tables = struct.unpack(">H", self.data[4:6])[0]
+        self.tables = {}
+        for index in range(num_tables):
+            tag, _, offset, length = struct.unpack(">4sIII", self.data[12 + 16 * index:28 + 16 * index])
+            self.tables[tag.decode("latin-1")] = (offset, length)
+
+        head = self.table("head")
+        self.units_per_em = struct.unpack(">H", head[18:20])[0]
+        self.bbox = struct.unpack(">4h", head[36:44])
+        long_loca = struct.unpack(">h", head[50:52])[0] == 1
+        hhea = self.table("hhea")
+        self.ascent, self.descent = struct.unpack(">hh", hhea[4:8])
+        number_of_hmetrics = struct.unpack(">H", hhea[34:36])[0]
+        self.num_glyphs = struct.unpack(">H", self.table("maxp")[4:6])[0]
+
+        hmtx = self.table("hmtx")
+        advances = [struct.unpack(">H", hmtx[4 * i:4 * i + 2])[0] for i in range(number_of_hmetrics)]
+        self.advances = advances + [advances[-1]] * (self.num_glyphs - number_of_hmetrics)
+
+        loca = self.table("loca")
+        if long_loca:
+            self.loca = struct.unpack(f">{self.num_glyphs + 1}I", loca[:4 * (self.num_glyphs + 1)])
+        else:
+            self.loca = [offset * 2 for offset in
+                         struct.unpack(f">{self.num_glyphs + 1}H", loca[:2 * (self.num_glyphs + 1)])]
+
+        os2 = self.table("OS/2")
+        self.cap_height = self.ascent
+        if os2 and struct.unpack(">H", os2[0:2])[0] >= 2:
+            self.cap_height = struct.unpack(">h", os2[88:90])[0]
+        self.cmap = self._parse_cmap()
+
+    def table(self, tag: str) -> bytes:
+        if tag not in self.tables:
+            return b""
+        offset, length = self.tables[tag]
+        return self.data[offset:offset + length]
+
+    def _parse_cmap(self) -> dict:
+        cmap = self.table("cmap")
+        subtables = {}
+        for index in range(struct.unpack(">H", cmap[2:4])[0]):
+            platform, encoding, offset = struct.unpack(">HHI", cmap[4 + 8 * index:12 + 8 * index])
+            subtables[(platform, encoding)] = offset
+
+        mapping = {}
+        if (3, 10) in subtables:
+            offset = subtables[(3, 10)]
+            count = struct.unpack(">I", cmap[offset + 12:offset + 16])[0]
+            for group in range(count):
+                start, end, glyph = struct.unpack(">III", cmap[offset + 16 + 12 * group:offset + 28 + 12 * group])
+                for code in range(start, end + 1):
+                    mapping[code] = glyph + code - start
+            return mapping
+
+        offset = subtables.get((3, 1))
+        if offset is None:
+            raise NativeRenderError("В шрифте нет таблицы символов Unicode")
+        seg_count = struct.unpack(">H", cmap[offset + 6:offset + 8])[0] // 2
+        ends_at = offset + 14
+        starts_at = ends_at + 2 * seg_count + 2
+        deltas_at = starts_at + 2 * seg_count
+        range_offsets_at = deltas_at + 2 * seg_count
+        for segment in range(seg_count):
+            end = struct.unpack(">H", cmap[ends_at + 2 * segment:ends_at + 2 * segment + 2])[0]
+            start = struct.unpack(">H", cmap[starts_at + 2 * segment:starts_at + 2 * segment + 2])[0]
+            delta = struct.unpack(">h", cmap[deltas_at + 2 * segment:deltas_at + 2 * segment + 2])[0]
+            range_offset_at = range_offsets_at + 2 * segment
+            range_offset = struct.unpack(">H", cmap[range_offset_at:range_offset_at + 2])[0]
+            for code in range(start, end + 1):
+                if code == 0xFFFF:
+                    continue
+                if range_offset:
+                    glyph_at = range_offset_at + range_offset + 2 * (code - start)
+                    glyph = struct.unpack(">H", cmap[glyph_at:glyph_at + 2])[0]
+                    if glyph:
+                        glyph = (glyph + delta) & 0xFFFF
+                else:
+                    glyph = (code + delta) & 0xFFFF
+                if glyph:
+                    mapping[code] = glyph
+        return mapping
+
+    def _glyph(self, glyph: int) -> bytes:
+        glyf_offset = self.tables["glyf"][0]
+        return self.data[glyf_offset + self.loca[glyph]:glyf_offset + self.loca[glyph + 1]]
+
+    def _components(self, glyph: int) -> list:
+        data = self._glyph(glyph)
+        if len(data) < 10 or struct.unpack(">h", data[0:2])[0] >= 0:
+            return []
+        components = []
+        position = 10
+        while True:
+            flags, component = struct.unpack(">HH", data[position:position + 4])
+            components.append(component)
+            position += 4 + (4 if flags & 0x0001 else 2)
+            if flags & 0x0008:
+                position += 2
+            elif flags & 0x0040:
+                position += 4
+            elif flags & 0x0080:
+                position += 8
+            if not flags & 0x0020:
+                return components
+
+    def subset(self, glyphs: set) -> bytes:
+        """
+        Файл шрифта, в котором сохранены контуры только указанных глифов (и
+        составляющих составных глифов). Номера глифов не меняются, остальные
+        глифы пустые.
+        """
+        keep = {0}
+        pending = list(glyphs)
+        while pending:
+            glyph = pending.pop()
+            if glyph in keep:
+                continue
+            keep.add(glyph)
+            pending.extend(self._components(glyph))
+
+        glyf = bytearray()
+        loca = []
+        for glyph in range(self.num_glyphs):
+            loca.append(len(glyf))
+            if glyph in keep:
+                data = self._glyph(glyph)
+                glyf += data + b"\0" * (-len(data) % 4)
+        loca.append(len(glyf))
+
+        head = bytearray(self.table("head"))
+        head[8:12] = b"\0\0\0\0"
+        head[50:52] = struct.pack(">h", 1)
+        tables = {
+            "head": bytes(head),
+            "hhea": self.table("hhea"),
+            "maxp": self.table("maxp"),
+            "hmtx": self.table("hmtx"),
+            "loca": struct.pack(f">{len(loca)}I", *loca),
+            "glyf": bytes(glyf)
+        }
+        for tag in ("cvt ", "fpgm", "prep"):
+            if tag in self.tables:
+                tables[tag] = self.table(tag)
+        return _build_sfnt(tables)
+
+    def glyph_width(self, glyph: int) -> int:
+        """
+        Ширина глифа в единицах PDF (1/1000 кегля)
+        """
+        return round(self.advances[glyph] * 1000 / self.units_per_em)
+
+
+def _checksum(data: bytes) -> int:
+    data += b"\0" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+
+def _build_sfnt(tables: dict) -> bytes:
+    tags = sorted(tables)
+    entry_selector = max(power for power in range(16) if 2 ** power <= len(tags))
+    search_range = 16 * 2 ** entry_selector
+    header = struct.pack(">IHHHH", 0x00010000, len(tags), search_range,
+                         entry_selector, 16 * len(tags) - search_range)
+
+    records = b""
+    body = b""
+    offset = 12 + 16 * len(tags)
+    head_offset = None
+    for tag in tags:
+        data = tables[tag]
+        if tag == "head":
+            head_offset = offset + len(body)
+        records += struct.pack(">4sIII", tag.encode("latin-1"), _checksum(data), offset + len(body), len(data))
+        body += data + b"\0" * (-len(data) % 4)
+
+    font = bytearray(header + records + body)
+    adjustment = (0xB1B0AFBA - _checksum(bytes(font))) & 0xFFFFFFFF
+    font[head_offset + 8:head_offset + 12] = struct.pack(">I", adjustment)
+    return bytes(font)
+
+
+def _stream(dictionary: str, data: bytes, compress: bool = True) -> bytes:
+    if compress:
+        data = zlib.compress(data)
+        dictionary += " /Filter /FlateDecode"
+    return (f"<< {dictionary} /Length {len(data)} >>\nstream\n".encode("latin-1")
+            + data + b"\nendstream")
+
+
+class EmbeddedFont:
+    """
+    Шрифт для встраивания в PDF: подмножество глифов CHARSET, ширины и
+    таблица ToUnicode. Объекты PDF шрифта строятся один раз.
+    """
+
+    def __init__(self, path: str):
+        self.font = TrueTypeFont(path)
+        self.glyphs = {char: self.font.cmap[ord(char)] for char in CHARSET if ord(char) in self.font.cmap}
+        glyph_set = set(self.glyphs.values())
+        tag = "".join(chr(ord("A") + byte % 26)
+                      for byte in hashlib.md5(repr(sorted(glyph_set)).encode()).digest()[:6])
+        self.name = f"{tag}+" + "".join(c for c in os.path.splitext(os.path.basename(path))[0] if c.isalnum())
+        self.font_file = self.font.subset(glyph_set)
+
+    def encode(self, text: str) -> str:
+        try:
+            return "".join(f"{self.glyphs[char]:04X}" for char in text)
+        except KeyError as e:
+            raise NativeRenderError(f"Символ {e.args[0]!r} отсутствует во встроенном шрифте")
+
+    def width(self, text: str, size: float) -> float:
+        try:
+            return sum(self.font.glyph_width(self.glyphs[char]) for char in text) * size / 1000
+        except KeyError as e:
+            raise NativeRenderError(f"Символ {e.args[0]!r} отсутствует во встроенном шрифте")
+
+    def wrap(self, text: str, size: float, width: float) -> list:
+        """
+        Разбивает текст на строки не шире width: по пробелам, слишком длинные слова — по символам
+        """
+        lines = []
+        for paragraph in str(text).split("\n"):
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = f"{line} {word}" if line else word
+                if self.width(candidate, size) <= width:
+                    line = candidate
+                    continue
+                if line:
+                    lines.append(line)
+                line = ""
+                for char in word:
+                    if line and self.width(line + char, size) > width:
+                        lines.append(line)
+                        line = ""
+                    line += char
+            lines.append(line)
+        return lines
+
+    def objects(self, first: int) -> list:
+        """
+        Объекты PDF шрифта с номерами first..first+4; первый — сам шрифт (Type0)
+        """
+        widths = []
+        for glyph in sorted(set(self.glyphs.values())):
+            widths.append(f"{glyph} [{self.font.glyph_width(glyph)}]")
+        scale = 1000 / self.font.units_per_em
+        bbox = " ".join(str(round(value * scale)) for value in self.font.bbox)
+        to_unicode = (
+            "/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+            "/CMapName /Adobe-Identity-UCS def /CMapType 2 def\n"
+            "1 begincodespacerange <0000> <FFFF> endcodespacerange\n"
+        )
+        pairs = sorted((glyph, char) for char, glyph in self.glyphs.items())
+        for start in range(0, len(pairs), 100):
+            chunk = pairs[start:start + 100]
+            to_unicode += f"{len(chunk)} beginbfchar\n"
+            to_unicode += "".join(
+                f"<{glyph:04X}> <{char.encode('utf-16-be').hex().upper()}>\n" for glyph, char in chunk
+            )
+            to_unicode += "endbfchar\n"
+        to_unicode += "endcmap CMapName currentdict /CMap defineresource pop end end\n"
+
+        return [
+            (f"<< /Type /Font /Subtype /Type0 /BaseFont /{self.name} /Encoding /Identity-H "
+             f"/DescendantFonts [{first + 1} 0 R] /ToUnicode {first + 4} 0 R >>").encode("latin-1"),
+            (f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{self.name} "
+             f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+             f"/FontDescriptor {first + 2} 0 R /CIDToGIDMap /Identity /DW 1000 "
+             f"/W [{' '.join(widths)}] >>").encode("latin-1"),
+            (f"<< /Type /FontDescriptor /FontName /{self.name} /Flags 32 /FontBBox [{bbox}] "
+             f"/ItalicAngle 0 /Ascent {round(self.font.ascent * scale)} "
+             f"/Descent {round(self.font.descent * scale)} /CapHeight {round(self.font.cap_height * scale)} "
+             f"/StemV 80 /FontFile2 {first + 3} 0 R >>").encode("latin-1"),
+            _stream(f"/Length1 {len(self.font_file)}", self.font_file),
+            _stream("", to_unicode.encode("latin-1"))
+        ]
+
+
+def _image_objects(png: bytes, first: int) -> list:
+    """
+    Объекты PDF изображения (RGB и маска прозрачности) с номерами first, first+1
+    """
+    with PILImage.open(io.BytesIO(png)) as image:
+        image = image.convert("RGBA")
+        width, height = image.size
+        rgb = image.convert("RGB").tobytes()
+        alpha = image.getchannel("A").tobytes()
+    return [
+        _stream(f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /SMask {first + 1} 0 R", rgb),
+        _stream(f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 8", alpha)
+    ]
+
+
+class Canvas:
+    """
+    Операторы содержимого страницы. Координата y отсчитывается от верхнего края страницы.
+    """
+
+    def __init__(self, font: EmbeddedFont):
+        self.font = font
+        self.ops = []
+
+    def text(self, x: float, y: float, text: str, size: float = 12,
+             align: str = "left", width: float = 0):
+        """
+        Строка текста с базовой линией y; при align center/right выравнивается внутри width
+        """
+        if align == "center":
+            x += (width - self.font.width(text, size)) / 2
+        elif align == "right":
+            x += width - self.font.width(text, size)
+        self.ops.append(f"BT /F1 {size:g} Tf {x:.2f} {PAGE_HEIGHT - y:.2f} Td <{self.font.encode(text)}> Tj ET")
+
+    def paragraph(self, x: float, y: float, text: str, width: float, size: float = 12,
+                  align: str = "left", max_lines: int = None, min_size: float = 8) -> float:
+        """
+        Текст с переносом по ширине width. Если он не помещается в max_lines строк,
+        кегль уменьшается до min_size.
+
+        Returns:
+            float: Координата y под последней строкой
+        """
+        lines = self.font.wrap(text, size, width)
+        while max_lines and len(lines) > max_lines:
+            size -= 1
+            if size < min_size:
+                raise NativeRenderError("Текст не помещается в макет документа")
+            lines = self.font.wrap(text, size, width)
+        for index, line in enumerate(lines):
+            self.text(x, y + index * size * LEADING, line, size, align, width)
+        return y + (len(lines) - 1) * size * LEADING + size * LEADING
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, width: float = 0.5):
+        self.ops.append(f"{width:g} w {x1:.2f} {PAGE_HEIGHT - y1:.2f} m {x2:.2f} {PAGE_HEIGHT - y2:.2f} l S")
+
+    def image(self, x: float, y: float, width: float, height: float):
+        self.ops.append(f"q {width:.2f} 0 0 {height:.2f} {x:.2f} {PAGE_HEIGHT - y - height:.2f} cm /Im1 Do Q")
+
+    def content(self) -> bytes:
+        return "\n".join(self.ops).encode("latin-1")
+
+
+class PageTemplate:
+    """
+    PDF с заранее собранной неизменной частью.
+
+    Шрифт, логотип и фоны страниц (статичные надписи шаблона) сериализуются
+    один раз при создании; на каждый документ добавляются только потоки с
+    текстом страниц, объекты страниц и таблица xref.
+    """
+
+    def __init__(self, font: EmbeddedFont, backgrounds: list, logo_png: bytes = None):
+        objects = [_stream("", background.content()) for background in backgrounds]
+        font_ref = len(objects) + 1
+        objects += font.objects(font_ref)
+        resources = f"/Font << /F1 {font_ref} 0 R >>"
+        if logo_png:
+            image_ref = len(objects) + 1
+            objects += _image_objects(logo_png, image_ref)
+            resources += f" /XObject << /Im1 {image_ref} 0 R >>"
+        self.resources = resources
+
+        prefix = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.offsets = []
+        for number, body in enumerate(objects, start=1):
+            self.offsets.append(len(prefix))
+            prefix += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+        self.prefix = bytes(prefix)
+
+    def render(self, pages: list) -> bytes:
+        """
+        Args:
+            pages (list): Страницы документа — пары (номер фона, Canvas с текстом страницы)
+        """
+        first = len(self.offsets) + 1
+        pages_ref = first + 2 * len(pages)
+        objects = []
+        for index, (background, overlay) in enumerate(pages):
+            objects.append(_stream("", overlay.content()))
+            objects.append(
+                (f"<< /Type /Page /Parent {pages_ref} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                 f"/Resources << {self.resources} >> "
+                 f"/Contents [{background + 1} 0 R {first + 2 * index} 0 R] >>").encode("latin-1")
+            )
+        kids = " ".join(f"{first + 2 * index + 1} 0 R" for index in range(len(pages)))
+        objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode("latin-1"))
+        objects.append(f"<< /Type /Catalog /Pages {pages_ref} 0 R >>".encode("latin-1"))
+
+        output = bytearray(self.prefix)
+        offsets = list(self.offsets)
+        for number, body in enumerate(objects, start=first):
+            offsets.append(len(output))
+            output += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+
+        xref = len(output)
+        output += f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode("latin-1")
+        output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+        output += (f"trailer\n<< /Size {len(offsets) + 1} /Root {pages_ref + 1} 0 R >>\n"
+                   f"startxref\n{xref}\n%%EOF\n").encode("latin-1")
+        return bytes(output)
+
+
+# Путь к шрифту -> ((mtime, размер файла), EmbeddedFont)
+_font_cache = {}
+_font_lock = threading.Lock()
+
+def load_font(path: str) -> EmbeddedFont:
+    """
+    Шрифт разбирается и урезается до CHARSET один раз на процесс
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _font_lock:
+        cached = _font_cache.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+        font = EmbeddedFont(path)
+        _font_cache[path] = (version, font)
+        return font
+
+
+# Шаблоны, с которых снят макет ниже (SHA-256 содержимого assets/diploma.xlsx и
+# assets/diploma-addition.xlsx). Изменённый шаблон рендерится через LibreOffice,
+# пока макет и эти хеши не обновлены вслед за ним
+LAYOUT_TEMPLATES = (
+    "67fbb6fb0585726cc31ede87520af503cae0212209141953b9f7eb5fa70f5d63",
+    "61ac4a2d91881ee9cc5753596ec327a0e11bafaaabb683af9b1969829f14396a"
+)
+
+
+def layout_matches(diploma_template: str, appendix_template: str) -> bool:
+    """
+    Проверяет, что шаблоны диплома и приложения совпадают с теми, по которым снят макет
+    """
+    for path, expected in zip((diploma_template, appendix_template), LAYOUT_TEMPLATES):
+        if not path or not os.path.exists(path):
+            return False
+        with open(path, "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != expected:
+                return False
+    return True
+
+
+# Колонки таблицы приложения: (заголовок, ширина, выравнивание)
+APPENDIX_COLUMNS = (
+    ("№", 34, "center"),
+    ("Название задания", 236, "left"),
+    ("Оценка", 90, "center"),
+    ("Время (мин)", 110, "center")
+)
+LOGO_WIDTH, LOGO_HEIGHT = 112.5, 67.5
+# Фоны страниц приложения: первая страница, продолжение таблицы, страница без таблицы
+APPENDIX_FIRST, APPENDIX_TABLE, APPENDIX_BLANK = 0, 1, 2
+# Верх таблицы на первой странице и на страницах продолжения
+TABLE_TOP = 320
+TABLE_CONTINUED_TOP = MARGIN_TOP + 12
+# Высота блока итогов и подписи под таблицей
+SUMMARY_HEIGHT = 130
+
+
+class NativePDFRenderer:
+    """
+    Рисует PDF диплома и приложения стандартных шаблонов без LibreOffice.
+
+    Макет повторяет assets/diploma.xlsx и assets/diploma-addition.xlsx: логотип,
+    заголовок, подписи полей и шапка таблицы — неизменный фон, собранный один
+    раз; на каждый документ рисуются только значения. Длинная таблица
+    продолжается на следующих страницах.
+    """
+
+    def __init__(self, font_path: str, logo_png: bytes = None):
+        self.font = load_font(font_path)
+        self.content_width = PAGE_WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+        self.table_width = sum(column[1] for column in APPENDIX_COLUMNS)
+        has_logo = logo_png is not None
+        self.diploma_template = PageTemplate(self.font, [self._diploma_background(has_logo)], logo_png)
+        self.appendix_template = PageTemplate(self.font, [
+            self._appendix_background(has_logo),
+            self._table_header(Canvas(self.font), TABLE_CONTINUED_TOP),
+            Canvas(self.font)
+        ], logo_png)
+
+    def _title(self, canvas: Canvas, has_logo: bool, logo_x: float):
+        if has_logo:
+            canvas.image(logo_x, MARGIN_TOP, LOGO_WIDTH, LOGO_HEIGHT)
+        canvas.text(MARGIN_LEFT, MARGIN_TOP + 140, "Диплом", 32, "center", self.content_width)
+
+    def _diploma_background(self, has_logo: bool) -> Canvas:
+        canvas = Canvas(self.font)
+        self._title(canvas, has_logo, (PAGE_WIDTH - LOGO_WIDTH) / 2)
+        for y, label in ((300, "Выдан:"), (370, "Тема:"), (470, "Оценка:")):
+            canvas.text(MARGIN_LEFT, y, label)
+        return canvas
+
+    def _table_header(self, canvas: Canvas, top: float) -> Canvas:
+        x = MARGIN_LEFT
+        for title, width, _ in APPENDIX_COLUMNS:
+            canvas.text(x, top, title, 12, "center", width)
+            x += width
+        canvas.line(MARGIN_LEFT, top + 6, MARGIN_LEFT + self.table_width, top + 6)
+        return canvas
+
+    def _appendix_background(self, has_logo: bool) -> Canvas:
+        canvas = Canvas(self.font)
+        self._title(canvas, has_logo, MARGIN_LEFT + APPENDIX_COLUMNS[0][1] + 40)
+        return self._table_header(canvas, TABLE_TOP)
+
+    def render_diploma(self, student_name: str, topic_name: str, avg_score: float) -> bytes:
+        canvas = Canvas(self.font)
+        value_x = MARGIN_LEFT + 80
+        value_width = self.content_width - 80
+        canvas.paragraph(value_x, 300, student_name, value_width, align="right", max_lines=3)
+        canvas.paragraph(value_x, 370, topic_name, value_width, align="right", max_lines=5)
+        canvas.text(value_x, 470, f"{avg_score:.1f}", 12, "right", value_width)
+        return self.diploma_template.render([(0, canvas)])
+
+    def render_appendix(self, topic_name: str, rows: list, total_score, total_time,
+                        avg_score: float, signature: tuple) -> bytes:
+        """
+        Args:
+            rows (list): Строки таблицы (№, название, оценка, время)
+            signature (tuple): (кем выдано, фамилия и инициалы, дата)
+        """
+        bottom = PAGE_HEIGHT - MARGIN_BOTTOM
+        canvas = Canvas(self.font)
+        pages = [(APPENDIX_FIRST, canvas)]
+        canvas.paragraph(MARGIN_LEFT, 250, f"Результаты по теме: {topic_name}",
+                         self.content_width, align="center", max_lines=3)
+
+        y = TABLE_TOP + 28
+        for row in rows:
+            name_lines = self.font.wrap(row[1], 12, APPENDIX_COLUMNS[1][1] - 8)
+            row_height = len(name_lines) * 12 * LEADING + 6
+            if y + row_height - 12 > bottom:
+                canvas = Canvas(self.font)
+                pages.append((APPENDIX_TABLE, canvas))
+                y = TABLE_CONTINUED_TOP + 28
+            x = MARGIN_LEFT
+            for index, (value, (_, width, align)) in enumerate(zip(row, APPENDIX_COLUMNS)):
+                if index == 1:
+                    canvas.paragraph(x + 4, y, value, width - 8)
+                else:
+                    canvas.text(x, y, str(value), 12, align, width)
+                x += width
+            y += row_height
+
+        if y + SUMMARY_HEIGHT > bottom:
+            canvas = Canvas(self.font)
+            pages.append((APPENDIX_BLANK, canvas))
+            y = MARGIN_TOP + 12
+        else:
+            canvas.line(MARGIN_LEFT, y - 12, MARGIN_LEFT + self.table_width, y - 12)
+
+        x_score = MARGIN_LEFT + APPENDIX_COLUMNS[0][1] + APPENDIX_COLUMNS[1][1]
+        canvas.text(MARGIN_LEFT, y + 6, "Итого:")
+        canvas.text(x_score, y + 6, str(total_score), 12, "center", APPENDIX_COLUMNS[2][1])
+        canvas.text(x_score + APPENDIX_COLUMNS[2][1], y + 6, str(total_time), 12, "center", APPENDIX_COLUMNS[3][1])
+        canvas.text(MARGIN_LEFT + APPENDIX_COLUMNS[0][1] + 4, y + 30, f"Средний балл: {avg_score:.1f}")
+
+        issued_by, short_name, date = signature
+        y += 64
+        column = self.content_width / 4
+        canvas.paragraph(MARGIN_LEFT, y, issued_by, column - 8, max_lines=3)
+        canvas.paragraph(MARGIN_LEFT + column, y, short_name, column - 8, max_lines=3)
+        canvas.text(MARGIN_LEFT + 2 * column, y, "_" * 6, 12, "center", column)
+        canvas.text(MARGIN_LEFT + 3 * column, y, date, 12, "right", column)
+        return self.appendix_template.render(pages)
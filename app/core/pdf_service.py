@@ -2,7 +2,13 @@ import os
 import subprocess
 import logging
 import platform
+import shutil
+import tempfile
+import threading
 import time
+from pathlib import Path
+from .office_pool import OfficePool
+from .pdf_config import PDF_CONFIG
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,12 +17,17 @@ logging.basicConfig(
 logger = logging.getLogger('PDFService')
 
 class PDFService:   
-    def __init__(self, timeout=30):
+    _libreoffice_available = None
+
+    def __init__(self, timeout=30, use_pool=True):
         self.timeout = timeout
         self.system = platform.system()
-        self.libreoffice_available = self._check_command("libreoffice", "--version")
-        logger.info("Окружение: %s", self.system)
-        logger.info("LibreOffice доступен: %s", self.libreoffice_available)
+        if PDFService._libreoffice_available is None:
+            PDFService._libreoffice_available = self._check_command(PDF_CONFIG['binary'], "--version")
+            logger.info("Окружение: %s", self.system)
+            logger.info("LibreOffice доступен: %s", PDFService._libreoffice_available)
+        self.libreoffice_available = PDFService._libreoffice_available
+        self.pool = OfficePool.get_instance() if use_pool and self.libreoffice_available else None
     
     def _check_command(self, command, arg):
         try:
@@ -31,7 +42,8 @@ class PDFService:
         except:
             return False
             
-    def _run_command_with_retry(self, cmd, max_retries=3, retry_delay=2):
+    def _run_command_with_retry(self, cmd, max_retries=3, retry_delay=2, timeout=None):
+        timeout = timeout or self.timeout
         attempts = 0
         while attempts < max_retries:
             attempts += 1
@@ -41,7 +53,7 @@ class PDFService:
                     cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
-                    timeout=self.timeout,
+                    timeout=timeout,
                     check=False
                 )
                 
@@ -65,9 +77,9 @@ class PDFService:
                 time.sleep(retry_delay)
                 
             except subprocess.TimeoutExpired:
-                logger.error("Превышено время ожидания (%d сек) для команды", self.timeout)
+                logger.error("Превышено время ожидания (%d сек) для команды", timeout)
                 if attempts >= max_retries:
-                    return False, "", f"Превышено время ожидания ({self.timeout} сек)"
+                    return False, "", f"Превышено время ожидания ({timeout} сек)"
                 logger.info("Ожидание %d секунд перед повторной попыткой...", retry_delay)
                 time.sleep(retry_delay)
                 
@@ -87,6 +99,16 @@ class PDFService:
         
         pdf_path = os.path.splitext(excel_path)[0] + ".pdf"
         
+        if self.pool is not None:
+            logger.info("Конвертация через пул LibreOffice: %s", excel_path)
+            try:
+                if self.pool.convert(excel_path, pdf_path):
+                    logger.info("Файл успешно конвертирован в PDF: %s", pdf_path)
+                    return pdf_path
+            except Exception as e:
+                logger.error("Пул LibreOffice недоступен: %s", str(e))
+            logger.warning("Пул LibreOffice не справился, запуск отдельного процесса")
+
         if self.libreoffice_available:
             result = self._convert_with_libreoffice(excel_path, pdf_path)
             if result:
@@ -98,6 +120,145 @@ class PDFService:
         logger.error("Не удалось конвертировать файл в PDF: %s", excel_path)
         return None
     
+    def convert_many(self, excel_paths):
+        """
+        Конвертирует несколько Excel файлов в PDF за одно обращение к LibreOffice
+        
+        Args:
+            excel_paths (list): Пути к Excel файлам
+            
+        Returns:
+            dict: Путь к Excel файлу -> путь к PDF или None, если конвертация не удалась
+        """
+        results = {}
+        pending = []
+        for excel_path in dict.fromkeys(excel_paths):
+            if os.path.exists(excel_path):
+                pending.append(excel_path)
+            else:
+                logger.error("Excel файл не найден: %s", excel_path)
+                results[excel_path] = None
+        
+        if not pending:
+            return results
+        
+        jobs = {excel_path: os.path.splitext(excel_path)[0] + ".pdf" for excel_path in pending}
+        
+        if self.pool is not None:
+            logger.info("Пакетная конвертация через пул LibreOffice: %d файлов", len(jobs))
+            try:
+                converted = self.pool.convert_many(jobs)
+            except Exception as e:
+                logger.error("Пул LibreOffice недоступен: %s", str(e))
+                converted = {}
+            for excel_path, success in converted.items():
+                if success:
+                    results[excel_path] = jobs.pop(excel_path)
+        
+        if jobs and self.libreoffice_available:
+            converted = self._convert_many_with_libreoffice(list(jobs))
+            for excel_path, success in converted.items():
+                if success:
+                    results[excel_path] = jobs.pop(excel_path)
+        elif jobs:
+            logger.error("LibreOffice недоступен для конвертации")
+        
+        for excel_path in jobs:
+            logger.error("Не удалось конвертировать файл в PDF: %s", excel_path)
+            results[excel_path] = None
+        
+        return results
+    
+    def convert_bytes(self, data):
+        """
+        Конвертирует содержимое Excel файла в PDF
+        
+        Args:
+            data (bytes): Содержимое xlsx
+            
+        Returns:
+            bytes: Содержимое PDF или None, если конвертация не удалась
+        """
+        return self.convert_many_bytes({"document": data})["document"]
+    
+    def convert_many_bytes(self, documents):
+        """
+        Конвертирует несколько Excel документов в PDF через временный каталог в памяти
+        
+        Args:
+            documents (dict): Ключ -> содержимое xlsx
+            
+        Returns:
+            dict: Ключ -> содержимое PDF или None, если конвертация не удалась
+        """
+        workspace_dir = PDF_CONFIG['workspace_dir']
+        os.makedirs(workspace_dir, exist_ok=True)
+        workspace = tempfile.mkdtemp(prefix="pdf_", dir=workspace_dir)
+        try:
+            excel_paths = {}
+            for index, (key, data) in enumerate(documents.items()):
+                excel_path = os.path.join(workspace, f"document_{index}.xlsx")
+                with open(excel_path, "wb") as f:
+                    f.write(data)
+                excel_paths[key] = excel_path
+            
+            converted = self.convert_many(list(excel_paths.values()))
+            
+            results = {}
+            for key, excel_path in excel_paths.items():
+                pdf_path = converted.get(excel_path)
+                if pdf_path and os.path.exists(pdf_path):
+                    with open(pdf_path, "rb") as f:
+                        results[key] = f.read()
+                else:
+                    results[key] = None
+            return results
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+    
+    def _profile_arg(self):
+        profile_dir = os.path.join(
+            PDF_CONFIG['profile_dir'],
+            f"oneshot_{os.getpid()}_{threading.get_ident()}"
+        )
+        return f"-env:UserInstallation={Path(profile_dir).as_uri()}"
+    
+    def _convert_many_with_libreoffice(self, excel_paths):
+        results = {}
+        by_dir = {}
+        for excel_path in excel_paths:
+            output_dir = os.path.dirname(excel_path) or "."
+            by_dir.setdefault(output_dir, []).append(excel_path)
+        
+        batch_size = max(1, PDF_CONFIG['batch_size'])
+        for output_dir, paths in by_dir.items():
+            for start in range(0, len(paths), batch_size):
+                chunk = paths[start:start + batch_size]
+                for excel_path in chunk:
+                    stale_pdf = os.path.splitext(excel_path)[0] + ".pdf"
+                    if os.path.exists(stale_pdf):
+                        os.remove(stale_pdf)
+                
+                cmd = [
+                    PDF_CONFIG['binary'],
+                    "--headless",
+                    self._profile_arg(),
+                    "--convert-to",
+                    "pdf",
+                    "--outdir",
+                    output_dir
+                ] + chunk
+                
+                logger.info("Пакетная конвертация с помощью LibreOffice: %d файлов", len(chunk))
+                success, stdout, stderr = self._run_command_with_retry(cmd, timeout=self.timeout * len(chunk))
+                if not success:
+                    logger.error("Ошибка при пакетной конвертации с помощью LibreOffice: %s", stderr)
+                
+                for excel_path in chunk:
+                    results[excel_path] = os.path.exists(os.path.splitext(excel_path)[0] + ".pdf")
+        
+        return results
+    
     def _convert_with_libreoffice(self, excel_path, pdf_path):
         logger.info("Попытка конвертации с помощью LibreOffice: %s", excel_path)
         
@@ -108,8 +269,9 @@ class PDFService:
         os.makedirs(output_dir, exist_ok=True)
         
         cmd = [
-            "libreoffice", 
+            PDF_CONFIG['binary'], 
             "--headless", 
+            self._profile_arg(),
             "--convert-to", 
             "pdf", 
             "--outdir", 
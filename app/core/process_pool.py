@@ -0,0 +1,73 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+def _mp_context():
+    # Не fork: пул пересоздаётся и в работающем сервере, где уже есть потоки
+    # (пул LibreOffice, очередь заданий) и их захваченные блокировки
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class WarmProcessPool:
+    """
+    Долгоживущий пул процессов с прогревом.
+
+    Каждый процесс при запуске выполняет initializer (например, загружает шаблоны),
+    а start() поднимает все процессы заранее, чтобы первый запрос не ждал прогрева.
+    Если процесс пула аварийно завершился, пул пересоздаётся при следующей задаче.
+    """
+
+    def __init__(self, workers: int, initializer=None, initargs: tuple = ()):
+        self.workers = max(1, workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_mp_context(),
+                    initializer=self.initializer,
+                    initargs=self.initargs
+                )
+            return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        """
+        Запускает процессы пула и ждёт, пока они пройдут прогрев
+        """
+        futures = [self.submit(_worker_pid) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, fn, *args):
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            print("Пул процессов рендеринга аварийно остановлен, запускается заново")
+            self._reset(executor)
+            return self._get_executor().submit(fn, *args)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
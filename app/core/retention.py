@@ -0,0 +1,214 @@
+import os
+import stat
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from .storage import write_atomic
+
+
+class FileStore:
+    """
+    Каталог файлов с ограничением по возрасту и общему размеру.
+
+    Файлы раскладываются по подкаталогам из префикса хеша имени
+    (root/3f/a2/имя), поэтому ни один каталог не разрастается, а путь файла
+    вычисляется по имени без поиска. Индекс (размер и время последнего
+    обращения в порядке LRU) хранится в памяти и строится один раз при первом
+    обращении. Файл, записанный другим процессом в обход индекса, находится
+    одной проверкой stat по вычисленному пути.
+
+    Хранилище с rescan=True предназначено для каталога, куда файлы пишутся
+    напрямую (например, output/): индекс пересобирается при каждой очистке,
+    файлы не перекладываются, ключ — путь относительно root.
+    """
+
+    def __init__(self, root: str, max_age: int = None, max_bytes: int = None,
+                 shard_levels: int = 2, rescan: bool = False):
+        self.root = root
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.shard_levels = 0 if rescan else shard_levels
+        self.rescan = rescan
+        self.evicted = 0
+        # Имя -> [размер, время последнего обращения]; начало — давно не использованные
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def path(self, filename: str) -> str:
+        if not self.shard_levels:
+            return os.path.join(self.root, filename)
+        digest = hashlib.md5(filename.encode("utf-8")).hexdigest()
+        shards = [digest[2 * level:2 * level + 2] for level in range(self.shard_levels)]
+        return os.path.join(self.root, *shards, filename)
+
+    def load(self):
+        """
+        Строит индекс по содержимому каталога. Файлы, лежащие не в своём
+        подкаталоге (например, опубликованные до появления шардов), переносятся
+        на место, поэтому их ссылки продолжают работать.
+        """
+        with self._lock:
+            if self._loaded:
+                return
+            self._load_locked()
+
+    def _load_locked(self):
+        found = []
+        for directory, subdirs, names in os.walk(self.root):
+            # Скрытые каталоги — рабочие каталоги заданий, их файлы ещё не готовы
+            subdirs[:] = [subdir for subdir in subdirs if not subdir.startswith(".")]
+            for name in names:
+                if name.startswith("."):
+                    continue
+                full_path = os.path.join(directory, name)
+                key = os.path.relpath(full_path, self.root) if self.rescan else name
+                try:
+                    if not self.rescan and full_path != self.path(name):
+                        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+                        os.replace(full_path, self.path(name))
+                        full_path = self.path(name)
+                    file_stat = os.stat(full_path)
+                except OSError:
+                    continue
+                found.append((file_stat.st_mtime, key, file_stat.st_size))
+
+        self._entries.clear()
+        self._total_bytes = 0
+        for mtime, key, size in sorted(found):
+            self._entries[key] = [size, mtime]
+            self._total_bytes += size
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def lookup(self, filename: str):
+        """
+        Returns:
+            str: Путь к файлу или None, если файла нет
+        """
+        self._ensure_loaded()
+        path = self.path(filename)
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                entry[1] = time.time()
+                self._entries.move_to_end(filename)
+                return path
+
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
+        self._add(filename, file_stat.st_size)
+        return path
+
+    def forget(self, filename: str):
+        """
+        Убирает из индекса файл, удалённый в обход хранилища
+        """
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                self._total_bytes -= entry[0]
+
+    def put(self, filename: str, content: bytes) -> str:
+        self._ensure_loaded()
+        path = write_atomic(self.path(filename), content)
+        self._add(filename, len(content))
+        self._evict()
+        return path
+
+    def put_file(self, filename: str, source_path: str) -> str:
+        """
+        Переносит готовый файл в хранилище переименованием (source_path должен
+        быть на той же файловой системе)
+        """
+        self._ensure_loaded()
+        path = self.path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+        self._add(filename, os.path.getsize(path))
+        self._evict()
+        return path
+
+    def _add(self, filename: str, size: int):
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                self._total_bytes -= entry[0]
+            self._entries[filename] = [size, time.time()]
+            self._total_bytes += size
+
+    def _remove_locked(self, filename: str):
+        size, _ = self._entries.pop(filename)
+        self._total_bytes -= size
+        self.evicted += 1
+        try:
+            os.remove(self.path(filename))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove_locked(next(iter(self._entries)))
+
+    def sweep(self) -> int:
+        """
+        Удаляет файлы, к которым не обращались дольше max_age, и самые давно
+        использованные файлы сверх max_bytes
+
+        Returns:
+            int: Число удалённых файлов
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self.rescan:
+                self._load_locked()
+            evicted = self.evicted
+            if self.max_age:
+                deadline = time.time() - self.max_age
+                for filename, (_, used_at) in list(self._entries.items()):
+                    if used_at >= deadline:
+                        break
+                    self._remove_locked(filename)
+            if self.max_bytes:
+                while self._total_bytes > self.max_bytes and self._entries:
+                    self._remove_locked(next(iter(self._entries)))
+            return self.evicted - evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "evicted": self.evicted
+            }
+
+
+async def run_retention(stores: list, interval: int):
+    """
+    Периодическая очистка хранилищ. Запускается задачей из lifespan приложения;
+    первый проход сразу строит индексы.
+    """
+    while True:
+        for store in stores:
+            try:
+                removed = await asyncio.to_thread(store.sweep)
+                if removed:
+                    print(f"Удалено устаревших файлов из {store.root}: {removed}")
+            except Exception as e:
+                print(f"Ошибка очистки каталога {store.root}: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,163 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в одно выполнение.
+
+    Первый вызов с ключом выполняет функцию, остальные, пришедшие до его
+    завершения, ждут и получают тот же результат (или то же исключение).
+    После завершения ключ освобождается: следующий вызов выполнит функцию заново.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._in_flight)}
+
+
+class AsyncSingleFlight:
+    """
+    Вариант SingleFlight для корутин одного цикла событий.
+
+    Работа выполняется отдельной задачей, все одновременные вызовы с ключом
+    ждут её результат; отмена одного из ожидающих (например, клиент закрыл
+    соединение) не отменяет работу для остальных.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+
+    async def do(self, key, fn, *args):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._in_flight)}
+
+
+class FileLockSingleFlight:
+    """
+    Вариант SingleFlight для нескольких процессов (воркеров uvicorn) на одной машине.
+
+    Ключ отображается на один из stripes файлов блокировки в lock_dir (число
+    файлов ограничено, их не нужно удалять). Процесс, захвативший блокировку,
+    выполняет функцию; остальные ждут её освобождения и затем вызывают check —
+    например, чтение из общего дискового кэша, куда первый процесс положил
+    результат. Если check ничего не вернул, функция выполняется заново.
+    Без fcntl (не POSIX) функция выполняется без блокировки.
+    """
+
+    def __init__(self, lock_dir: str, timeout: float = 120, stripes: int = 256):
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self.stripes = stripes
+        self.calls = 0
+        self.waited = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def _lock_path(self, key) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.lock_dir, f"{int(digest, 16) % self.stripes}.lock")
+
+    def _acquire(self, lock_file) -> bool:
+        """
+        Returns:
+            bool: True, если пришлось ждать другой процесс
+        """
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            pass
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            time.sleep(0.05)
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError("Превышено время ожидания блокировки рендеринга")
+
+    def do(self, key, fn, *args, check=None):
+        with self._lock:
+            self.calls += 1
+        if fcntl is None:
+            return fn(*args)
+
+        with open(self._lock_path(key), "a+b") as lock_file:
+            try:
+                waited = self._acquire(lock_file)
+            except TimeoutError as e:
+                print(f"{e}, выполняется без блокировки")
+                return fn(*args)
+            try:
+                if waited:
+                    with self._lock:
+                        self.waited += 1
+                    result = check() if check is not None else None
+                    if result is not None:
+                        with self._lock:
+                            self.shared += 1
+                        return result
+                return fn(*args)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "waited": self.waited, "shared": self.shared}
@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+
+def write_atomic(path: str, data: bytes) -> str:
+    """
+    Записывает файл атомарно: содержимое пишется во временный файл в том же
+    каталоге и переименовывается, поэтому читатели не видят частично записанный файл.
+
+    Args:
+        path (str): Итоговый путь
+        data (bytes): Содержимое файла
+
+    Returns:
+        str: Итоговый путь
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
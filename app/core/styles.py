@@ -0,0 +1,39 @@
+from openpyxl.styles import Alignment, Font
+from openpyxl.styles.cell_style import StyleArray
+
+# Стили, которые генераторы назначают ячейкам. Объекты общие для всех документов:
+# их не нужно создавать заново для каждой ячейки
+FONT_REGULAR = Font(size=12)
+ALIGN_CENTER = Alignment(horizontal='center', vertical='center')
+ALIGN_CENTER_WRAP = Alignment(horizontal='center', vertical='center', wrap_text=True)
+ALIGN_RIGHT_WRAP = Alignment(horizontal='right', vertical='center', wrap_text=True)
+
+
+class WorkbookStyles:
+    """
+    Назначает стили ячейкам книги по ссылке.
+
+    Присваивание cell.font / cell.alignment каждый раз ищет стиль в таблице стилей
+    книги по хешу. Здесь номер стиля в таблице находится один раз на книгу, а
+    ячейке записывается только номер.
+    """
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+        self._ids = {}
+
+    def _style_id(self, collection: str, style) -> int:
+        key = (collection, id(style))
+        style_id = self._ids.get(key)
+        if style_id is None:
+            style_id = getattr(self.workbook, collection).add(style)
+            self._ids[key] = style_id
+        return style_id
+
+    def apply(self, cell, font: Font = None, alignment: Alignment = None):
+        if cell._style is None:
+            cell._style = StyleArray()
+        if font is not None:
+            cell._style.fontId = self._style_id("_fonts", font)
+        if alignment is not None:
+            cell._style.alignmentId = self._style_id("_alignments", alignment)
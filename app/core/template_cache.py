@@ -0,0 +1,50 @@
+import io
+import os
+import threading
+import openpyxl
+
+
+class TemplateCache:
+    """
+    Кэш шаблонов Excel на уровне процесса.
+
+    Содержимое шаблона читается с диска один раз и хранится в памяти. Каждый вызов
+    get_workbook разбирает его openpyxl в независимую книгу; при изменении файла
+    (mtime или размера) шаблон перечитывается.
+    """
+
+    _entries = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _stat_key(cls, template_path: str) -> tuple:
+        stat = os.stat(template_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def _get_entry(cls, template_path: str) -> dict:
+        template_path = os.path.abspath(template_path)
+        stat_key = cls._stat_key(template_path)
+        entry = cls._entries.get(template_path)
+        if entry is not None and entry["stat_key"] == stat_key:
+            return entry
+
+        with cls._lock:
+            entry = cls._entries.get(template_path)
+            if entry is None or entry["stat_key"] != stat_key:
+                with open(template_path, "rb") as f:
+                    entry = {"stat_key": stat_key, "blob": f.read()}
+                cls._entries[template_path] = entry
+        return entry
+
+    @classmethod
+    def get_workbook(cls, template_path: str):
+        return openpyxl.load_workbook(io.BytesIO(cls._get_entry(template_path)["blob"]))
+
+    @classmethod
+    def invalidate(cls, template_path: str = None):
+        with cls._lock:
+            if template_path is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop(os.path.abspath(template_path), None)
@@ -0,0 +1,253 @@
+import io
+import os
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_to_tuple
+from .excel_core import ExcelCore
+from . import layout
+from .pdf_config import RENDER_CONFIG
+
+_DIMENSION_RE = re.compile(r'<dimension ref="[^"]*" />')
+_COLS_RE = re.compile(r'<cols>.*?</cols>', re.S)
+_COL_RE = re.compile(r'<col ([^>]*?) ?/>')
+_ROW_RE = re.compile(r'<row ([^>]*?)(?: ?/>|>(.*?)</row>)', re.S)
+_CELL_RE = re.compile(r'<c r="([A-Z]+)(\d+)"([^>]*?)(?:/>|>.*?</c>)', re.S)
+_ATTR_RE = re.compile(r'([\w:]+)="([^"]*)"')
+_STYLE_RE = re.compile(r'\bs="(\d+)"')
+
+
+def _format_number(value) -> str:
+    return "%.16g" % value
+
+
+def _format_attrs(attrs: list) -> str:
+    return " ".join(f'{name}="{value}"' for name, value in attrs)
+
+
+def _set_attr(attrs: list, name: str, value: str) -> list:
+    if any(key == name for key, _ in attrs):
+        return [(key, value if key == name else val) for key, val in attrs]
+    return attrs + [(name, value)]
+
+
+class XlsxPatchTemplate:
+    """
+    Подготовленный шаблон для быстрого рендеринга без полной обработки openpyxl.
+
+    Шаблон один раз проходит через openpyxl вместе с логотипом и стилями генератора
+    (с запасом строк), после чего XML листа разбирается на строки и ячейки. При
+    рендеринге в готовые строки подставляются только изменённые ячейки, ширины
+    столбцов и высоты строк, а архив собирается из заранее подготовленных частей.
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, workbook_bytes: bytes, sheet_name: str, base_max_row: int,
+                 max_column: int, template_values: dict, merged_cells: set,
+                 row_style: int = 0):
+        self.sheet_name = sheet_name
+        self.row_style = str(row_style) if row_style else None
+        self.base_max_row = base_max_row
+        self.max_column = max_column
+        self.template_values = template_values
+        self.merged_cells = merged_cells
+
+        with zipfile.ZipFile(io.BytesIO(workbook_bytes)) as archive:
+            self.entries = [(info, archive.read(info.filename)) for info in archive.infolist()]
+
+        sheet_xml = dict((info.filename, data) for info, data in self.entries)[sheet_name].decode("utf-8")
+        head, rest = sheet_xml.split("<sheetData>", 1)
+        sheet_data, tail = rest.split("</sheetData>", 1)
+
+        cols_match = _COLS_RE.search(head)
+        self.head_start = _DIMENSION_RE.sub("{dimension}", head[:cols_match.start()])
+        self.head_end = head[cols_match.end():]
+        self.tail = tail
+
+        self.columns = {}
+        for col_match in _COL_RE.finditer(cols_match.group(0)):
+            attrs = _ATTR_RE.findall(col_match.group(1))
+            self.columns[int(dict(attrs)["min"])] = attrs
+
+        self.rows = {}
+        for row_match in _ROW_RE.finditer(sheet_data):
+            attrs = _ATTR_RE.findall(row_match.group(1))
+            cells = {}
+            for cell_match in _CELL_RE.finditer(row_match.group(2) or ""):
+                style = _STYLE_RE.search(cell_match.group(3))
+                cells[coordinate_to_tuple(cell_match.group(1) + cell_match.group(2))[1]] = (
+                    cell_match.group(0),
+                    style.group(1) if style else None
+                )
+            self.rows[int(dict(attrs)["r"])] = (attrs, cells)
+        self.max_row = max(self.rows) if self.rows else 0
+
+    @classmethod
+    def for_generator(cls, generator):
+        template_path = os.path.abspath(generator.template_path)
+        template_stat = os.stat(template_path)
+        logo_key = None
+        if generator.logo_path and os.path.exists(generator.logo_path):
+            logo_stat = os.stat(generator.logo_path)
+            logo_key = (os.path.abspath(generator.logo_path), logo_stat.st_mtime_ns, logo_stat.st_size)
+
+        key = (type(generator).__name__, template_path, template_stat.st_mtime_ns,
+               template_stat.st_size, logo_key)
+        template = cls._cache.get(key)
+        if template is None:
+            with cls._lock:
+                template = cls._cache.get(key)
+                if template is None:
+                    template = cls.prepare(generator)
+                    cls._cache = {
+                        cached_key: cached for cached_key, cached in cls._cache.items()
+                        if cached_key[:2] != key[:2]
+                    }
+                    cls._cache[key] = template
+        return template
+
+    @classmethod
+    def prepare(cls, generator, max_rows: int = None):
+        max_rows = max_rows or RENDER_CONFIG['patch_max_rows']
+        excel = ExcelCore.from_template(generator.template_path)
+        generator._add_logo(excel)
+
+        sheet = excel.sheet
+        base_max_row = sheet.max_row
+        max_column = sheet.max_column
+        template_values = {
+            position: cell.value for position, cell in sheet._cells.items()
+            if cell.value is not None
+        }
+        merged_cells = set()
+        for merged_range in sheet.merged_cells.ranges:
+            for position in merged_range.cells:
+                if position != (merged_range.min_row, merged_range.min_col):
+                    merged_cells.add(position)
+
+        for row in range(1, max(max_rows, base_max_row) + 1):
+            for col in range(1, max_column + 1):
+                sheet.cell(row=row, column=col)
+        generator._apply_styles(excel)
+        for col in range(1, max_column + 1):
+            sheet.column_dimensions[get_column_letter(col)].width = 1
+        # Стиль, который openpyxl записывает в новые строки с заданной высотой
+        row_style = excel.workbook._cell_styles.add(StyleArray())
+
+        buffer = io.BytesIO()
+        excel.workbook.save(buffer)
+        sheet_index = excel.workbook.worksheets.index(sheet)
+        return cls(
+            buffer.getvalue(),
+            f"xl/worksheets/sheet{sheet_index + 1}.xml",
+            base_max_row,
+            max_column,
+            template_values,
+            merged_cells,
+            row_style
+        )
+
+    def _cell_xml(self, coordinate: str, style: str, value) -> str:
+        attrs = f'r="{coordinate}"'
+        if style is not None:
+            attrs += f' s="{style}"'
+        if value is None or value == "":
+            data_type = "inlineStr" if value == "" else "n"
+            return f'<c {attrs} t="{data_type}" />'
+        if isinstance(value, str):
+            space = ' xml:space="preserve"' if value != value.strip() else ""
+            return f'<c {attrs} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+        return f'<c {attrs} t="n"><v>{_format_number(value)}</v></c>'
+
+    def _supports(self, positions: dict) -> bool:
+        for (row, col), value in positions.items():
+            if row > self.max_row or col > self.max_column or (row, col) in self.merged_cells:
+                return False
+            if isinstance(value, bool):
+                return False
+            if isinstance(value, str):
+                if (value.startswith("=") and len(value) > 1) or ILLEGAL_CHARACTERS_RE.search(value):
+                    return False
+            elif value is not None and not isinstance(value, (int, float)):
+                return False
+        return True
+
+    def render(self, values: dict, max_column_width: float, header_rows: tuple = None,
+               min_height: int = 20, column_widths: dict = None, row_heights: dict = None) -> bytes:
+        """
+        Собирает xlsx с подставленными значениями
+
+        Args:
+            values (dict): Адрес ячейки -> значение
+            max_column_width (float): Максимальная ширина столбца
+            header_rows (tuple): Диапазон строк заголовка, высота которых не меняется
+            min_height (int): Минимальная высота строки с содержимым
+            column_widths (dict): Принудительные ширины столбцов (номер -> ширина)
+            row_heights (dict): Принудительные высоты строк (номер -> высота)
+
+        Returns:
+            bytes: Содержимое xlsx или None, если значения не поддерживаются быстрым путём
+        """
+        positions = {coordinate_to_tuple(coordinate): value for coordinate, value in values.items()}
+        if not self._supports(positions):
+            return None
+
+        cell_values = dict(self.template_values)
+        cell_values.update(positions)
+        final_max_row = max([self.base_max_row] + [row for row, _ in positions])
+
+        widths = layout.column_widths(cell_values, self.max_column, max_column_width)
+        widths.update(column_widths or {})
+        heights = layout.row_heights(cell_values, widths, header_rows, min_height)
+        heights.update(row_heights or {})
+
+        cols_xml = []
+        for col in range(1, self.max_column + 1):
+            attrs = _set_attr(self.columns[col], "width", _format_number(widths[col]))
+            cols_xml.append(f"<col {_format_attrs(attrs)} />")
+
+        rows_xml = []
+        for row in sorted(self.rows):
+            attrs, cells = self.rows[row]
+            if row in heights:
+                attrs = _set_attr(attrs, "ht", _format_number(heights[row]))
+                attrs = _set_attr(attrs, "customHeight", "1")
+                if self.row_style and not any(key == "s" for key, _ in attrs):
+                    attrs = _set_attr(attrs, "s", self.row_style)
+            if row > final_max_row:
+                if len(attrs) > 1:
+                    rows_xml.append(f"<row {_format_attrs(attrs)} />")
+                continue
+
+            parts = [f"<row {_format_attrs(attrs)}>"]
+            for col in sorted(cells):
+                cell_xml, style = cells[col]
+                if (row, col) in positions:
+                    cell_xml = self._cell_xml(f"{get_column_letter(col)}{row}", style, positions[(row, col)])
+                parts.append(cell_xml)
+            parts.append("</row>")
+            rows_xml.append("".join(parts))
+
+        dimension = f'<dimension ref="A1:{get_column_letter(self.max_column)}{final_max_row}" />'
+        sheet_xml = "".join([
+            self.head_start.replace("{dimension}", dimension),
+            "<cols>", "".join(cols_xml), "</cols>",
+            self.head_end,
+            "<sheetData>", "".join(rows_xml), "</sheetData>",
+            self.tail
+        ])
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for info, data in self.entries:
+                if info.filename == self.sheet_name:
+                    data = sheet_xml.encode("utf-8")
+                archive.writestr(info, data)
+        return buffer.getvalue()
+
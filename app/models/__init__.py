@@ -1,6 +1,9 @@
 from .database import Database
 from .db_config import DB_CONFIG
 from .diploma_repository import DiplomaRepository
+from .async_database import AsyncDatabase
+from .async_diploma_repository import AsyncDiplomaRepository
+from .cached_repository import CachedDiplomaRepository, AsyncCachedDiplomaRepository
 
 try:
     Database.initialize()
@@ -0,0 +1,139 @@
+import time
+import uuid
+import weakref
+from psycopg_pool import AsyncConnectionPool
+from .db_config import DB_CONFIG
+from .statements import statement_registry
+
+class AsyncDatabase:
+    """
+    Асинхронный пул соединений (psycopg 3) для использования из обработчиков FastAPI.
+
+    Запросы пишутся в том же формате (%s), что и для Database. Повторяющиеся запросы
+    psycopg готовит на сервере (PREPARE) после prepare_threshold выполнений.
+    """
+
+    _connection_pool = None
+    # Когда соединение вернулось в пул: проверяются только простоявшие дольше check_interval
+    _idle_since = weakref.WeakKeyDictionary()
+
+    @classmethod
+    async def _mark_idle(cls, connection):
+        cls._idle_since[connection] = time.monotonic()
+
+    @classmethod
+    async def _check_idle(cls, connection):
+        idle_since = cls._idle_since.get(connection)
+        if idle_since is not None and time.monotonic() - idle_since < DB_CONFIG['pool_check_interval']:
+            return
+        await AsyncConnectionPool.check_connection(connection)
+
+    @classmethod
+    async def initialize(cls, host=None, port=None, database=None, user=None, password=None,
+                         min_conn=None, max_conn=None):
+        if cls._connection_pool is not None:
+            return
+
+        db_name = database or DB_CONFIG['database']
+        conninfo_params = {
+            "host": host or DB_CONFIG['host'],
+            "port": port or DB_CONFIG['port'],
+            "dbname": db_name,
+            "user": user or DB_CONFIG['user'],
+            "password": password or DB_CONFIG['password'],
+            "connect_timeout": DB_CONFIG['connect_timeout']
+        }
+
+        try:
+            connection_pool = AsyncConnectionPool(
+                # autocommit, как в Database: выборки идут без BEGIN/COMMIT
+                kwargs=dict(conninfo_params, prepare_threshold=DB_CONFIG['prepare_threshold'], autocommit=True),
+                min_size=min_conn or DB_CONFIG['min_conn'],
+                max_size=max_conn or DB_CONFIG['max_conn'],
+                timeout=DB_CONFIG['pool_timeout'],
+                max_lifetime=DB_CONFIG['pool_max_lifetime'],
+                # Простоявшее соединение проверяется перед выдачей, чтобы не отдать
+                # разорванное после перезапуска БД; недавно использованные — без проверки
+                configure=cls._mark_idle,
+                reset=cls._mark_idle,
+                check=cls._check_idle,
+                open=False
+            )
+            # Не ждём установки соединений: пул заполняется в фоне, как и при недоступной БД
+            await connection_pool.open(wait=False)
+            cls._connection_pool = connection_pool
+            print(f"Асинхронный пул соединений с базой данных {db_name} инициализирован")
+        except Exception as e:
+            print(f"Ошибка инициализации асинхронного пула соединений: {e}")
+            cls._connection_pool = None
+
+    @classmethod
+    async def execute_query(cls, query, params=None):
+        if cls._connection_pool is None:
+            await cls.initialize()
+
+        if cls._connection_pool is None:
+            raise Exception("Асинхронный пул соединений не инициализирован")
+
+        try:
+            async with cls._connection_pool.connection() as connection:
+                async with connection.cursor() as cursor:
+                    started = time.perf_counter()
+                    await cursor.execute(query, params)
+                    # Есть результат — это выборка
+                    result = await cursor.fetchall() if cursor.description is not None else None
+                    statement_registry.record(query, (time.perf_counter() - started) * 1000)
+                    return result
+        except Exception as e:
+            print(f"Ошибка выполнения запроса: {e}")
+            raise
+
+    @classmethod
+    def stats(cls) -> dict:
+        if cls._connection_pool is None:
+            return None
+        stats = cls._connection_pool.get_stats()
+        return {
+            "size": stats.get("pool_size", 0),
+            "in_use": stats.get("pool_size", 0) - stats.get("pool_available", 0),
+            "idle": stats.get("pool_available", 0),
+            "waiting": stats.get("requests_waiting", 0),
+            "max_size": stats.get("pool_max", 0),
+            "requests": stats.get("requests_num", 0),
+            "requests_waited": stats.get("requests_queued", 0),
+            "wait_ms": stats.get("requests_wait_ms", 0),
+            "timeouts": stats.get("requests_errors", 0),
+            "connections_opened": stats.get("connections_num", 0),
+            "connections_broken": stats.get("returns_bad", 0)
+        }
+
+    @classmethod
+    async def iterate_query(cls, query, params=None, itersize=None):
+        """
+        Асинхронный генератор строк выборки через серверный курсор,
+        строки забираются пачками по itersize
+        """
+        if cls._connection_pool is None:
+            await cls.initialize()
+
+        if cls._connection_pool is None:
+            raise Exception("Асинхронный пул соединений не инициализирован")
+
+        try:
+            # Серверный курсор живёт только внутри транзакции
+            async with cls._connection_pool.connection() as connection, connection.transaction():
+                async with connection.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = itersize or DB_CONFIG['itersize']
+                    await cursor.execute(query, params)
+                    async for row in cursor:
+                        yield row
+        except Exception as e:
+            print(f"Ошибка выполнения запроса: {e}")
+            raise
+
+    @classmethod
+    async def close_all(cls):
+        if cls._connection_pool:
+            await cls._connection_pool.close()
+            print("Все асинхронные соединения с базой данных закрыты")
+            cls._connection_pool = None
@@ -0,0 +1,239 @@
+from .async_database import AsyncDatabase
+from .statements import statement_registry
+from . import queries
+
+statement_registry.register(queries.STATEMENTS)
+
+class AsyncDiplomaRepository:
+    """
+    Асинхронный вариант DiplomaRepository с теми же методами и результатами
+    """
+
+    @classmethod
+    async def get_all_topics(cls):
+        try:
+            topics_data = await AsyncDatabase.execute_query(queries.SELECT_TOPICS)
+            return [queries.map_topic(row) for row in topics_data or []]
+        except Exception as e:
+            print(f"Ошибка получения списка тем: {e}")
+            return []
+
+    @classmethod
+    async def iter_all_topics(cls, itersize=None):
+        try:
+            async for row in AsyncDatabase.iterate_query(queries.SELECT_TOPICS, itersize=itersize):
+                yield queries.map_topic(row)
+        except Exception as e:
+            print(f"Ошибка получения списка тем: {e}")
+
+    @classmethod
+    async def get_topics_page(cls, after=None, limit=50):
+        try:
+            query, params = queries.topics_page_query(after, limit)
+            topic_data = await AsyncDatabase.execute_query(query, params)
+            return [queries.map_topic(row) for row in topic_data or []]
+        except Exception as e:
+            print(f"Ошибка получения страницы тем: {e}")
+            return []
+
+    @classmethod
+    async def get_topic_by_id(cls, topic_id):
+        try:
+            topic_data = await AsyncDatabase.execute_query(queries.SELECT_TOPIC_BY_ID, (topic_id,))
+
+            if topic_data:
+                return queries.map_topic(topic_data[0])
+            print(f"Тема с ID {topic_id} не найдена")
+            return None
+        except Exception as e:
+            print(f"Ошибка получения темы: {e}")
+            return None
+
+    @classmethod
+    async def get_topics_by_ids(cls, topic_ids):
+        try:
+            topics_data = await AsyncDatabase.execute_query(queries.SELECT_TOPICS_BY_IDS, (list(topic_ids),))
+            return {row[0]: queries.map_topic(row) for row in topics_data or []}
+        except Exception as e:
+            print(f"Ошибка получения списка тем по ID: {e}")
+            return {}
+
+    @classmethod
+    async def get_all_users(cls):
+        try:
+            users_data = await AsyncDatabase.execute_query(queries.SELECT_USERS)
+            return [queries.map_user(row) for row in users_data or []]
+        except Exception as e:
+            print(f"Ошибка получения списка пользователей: {e}")
+            return []
+
+    @classmethod
+    async def iter_all_users(cls, itersize=None):
+        try:
+            async for row in AsyncDatabase.iterate_query(queries.SELECT_USERS, itersize=itersize):
+                yield queries.map_user(row)
+        except Exception as e:
+            print(f"Ошибка получения списка пользователей: {e}")
+
+    @classmethod
+    async def get_users_page(cls, after=None, limit=50):
+        try:
+            query, params = queries.users_page_query(after, limit)
+            users_data = await AsyncDatabase.execute_query(query, params)
+            return [queries.map_user(row) for row in users_data or []]
+        except Exception as e:
+            print(f"Ошибка получения страницы пользователей: {e}")
+            return []
+
+    @classmethod
+    async def get_user_by_id(cls, user_id):
+        try:
+            user_data = await AsyncDatabase.execute_query(queries.SELECT_USER_BY_ID, (user_id,))
+
+            if user_data:
+                return queries.map_user(user_data[0])
+            print(f"Пользователь с ID {user_id} не найден")
+            return None
+        except Exception as e:
+            print(f"Ошибка получения пользователя: {e}")
+            return None
+
+    @classmethod
+    async def get_all_diplomas(cls):
+        try:
+            diploma_data = await AsyncDatabase.execute_query(queries.SELECT_DIPLOMAS)
+            return [queries.map_diploma_summary(row) for row in diploma_data or []]
+        except Exception as e:
+            print(f"Ошибка получения списка дипломов: {e}")
+            return []
+
+    @classmethod
+    async def iter_all_diplomas(cls, itersize=None):
+        try:
+            async for row in AsyncDatabase.iterate_query(queries.SELECT_DIPLOMAS, itersize=itersize):
+                yield queries.map_diploma_summary(row)
+        except Exception as e:
+            print(f"Ошибка получения списка дипломов: {e}")
+
+    @classmethod
+    async def get_diplomas_page(cls, after=None, limit=50):
+        try:
+            query, params = queries.diplomas_page_query(after, limit)
+            diploma_data = await AsyncDatabase.execute_query(query, params)
+            return [queries.map_diploma_summary(row) for row in diploma_data or []]
+        except Exception as e:
+            print(f"Ошибка получения страницы дипломов: {e}")
+            return []
+
+    @classmethod
+    async def get_diploma_by_id(cls, diploma_id):
+        try:
+            diploma_data = await AsyncDatabase.execute_query(queries.SELECT_DIPLOMA_BY_ID, (diploma_id,))
+
+            if diploma_data:
+                return queries.map_diploma(diploma_data[0])
+            print(f"Диплом с ID {diploma_id} не найден")
+            return None
+        except Exception as e:
+            print(f"Ошибка получения диплома: {e}")
+            return None
+
+    @classmethod
+    async def get_diplomas_by_ids(cls, diploma_ids):
+        try:
+            diploma_data = await AsyncDatabase.execute_query(queries.SELECT_DIPLOMAS_BY_IDS, (list(diploma_ids),))
+            return {row[0]: queries.map_diploma(row) for row in diploma_data or []}
+        except Exception as e:
+            print(f"Ошибка получения дипломов по ID: {e}")
+            return {}
+
+    @classmethod
+    async def get_diplomas_by_user_id(cls, user_id):
+        try:
+            diploma_data = await AsyncDatabase.execute_query(queries.SELECT_DIPLOMAS_BY_USER_ID, (user_id,))
+            return [queries.map_user_diploma(row) for row in diploma_data or []]
+        except Exception as e:
+            print(f"Ошибка получения дипломов пользователя: {e}")
+            return []
+
+    @classmethod
+    async def get_performed_tasks_by_user_id(cls, user_id):
+        try:
+            tasks_data = await AsyncDatabase.execute_query(queries.SELECT_PERFORMED_TASKS_BY_USER_ID, (user_id,))
+            return [queries.map_performed_task(row) for row in tasks_data or []]
+        except Exception as e:
+            print(f"Ошибка получения заданий пользователя: {e}")
+            return []
+
+    @classmethod
+    async def get_users_by_ids(cls, user_ids):
+        try:
+            users_data = await AsyncDatabase.execute_query(queries.SELECT_USERS_BY_IDS, (list(user_ids),))
+            return {row[0]: queries.map_user(row) for row in users_data or []}
+        except Exception as e:
+            print(f"Ошибка получения списка пользователей по ID: {e}")
+            return {}
+
+    @classmethod
+    async def get_performed_tasks_by_user_ids(cls, user_ids, topic_id=None):
+        try:
+            query, params = queries.performed_tasks_by_user_ids_query(user_ids, topic_id)
+            tasks_data = await AsyncDatabase.execute_query(query, params)
+            return queries.group_tasks_by_user(tasks_data, user_ids)
+        except Exception as e:
+            print(f"Ошибка получения заданий пользователей: {e}")
+            return {}
+
+    @classmethod
+    async def load_diploma_context(cls, user_id, topic_id):
+        try:
+            rows = await AsyncDatabase.execute_query(queries.SELECT_DIPLOMA_CONTEXT, (user_id, topic_id))
+            return queries.map_diploma_context(rows)
+        except Exception as e:
+            print(f"Ошибка загрузки данных для диплома: {e}")
+            return {"user": None, "topic": None, "tasks": []}
+
+    @classmethod
+    async def get_eligible_user_ids_by_topic(cls, topic_id):
+        try:
+            users_data = await AsyncDatabase.execute_query(queries.SELECT_ELIGIBLE_USER_IDS_BY_TOPIC, (topic_id,))
+            return [row[0] for row in users_data or []]
+        except Exception as e:
+            print(f"Ошибка получения пользователей, допущенных к диплому: {e}")
+            return []
+
+    @classmethod
+    async def get_task_by_id(cls, task_id):
+        try:
+            task_data = await AsyncDatabase.execute_query(queries.SELECT_PERFORMED_TASK_BY_ID, (task_id,))
+
+            if not task_data:
+                print(f"Задание с ID {task_id} не найдено")
+                return None
+            return queries.map_task_with_users(task_data[0])
+        except Exception as e:
+            print(f"Ошибка получения задания: {e}")
+            return None
+
+    @classmethod
+    async def get_performed_tasks_by_diploma_id(cls, diploma_id):
+        try:
+            diploma = await cls.get_diploma_by_id(diploma_id)
+            if not diploma or not diploma.get("user_id"):
+                return []
+            return await cls.get_performed_tasks_by_user_id(diploma["user_id"])
+        except Exception as e:
+            print(f"Ошибка получения заданий диплома: {e}")
+            return []
+
+    @classmethod
+    async def get_user_by_username(cls, username: str) -> dict:
+        try:
+            user_data = await AsyncDatabase.execute_query(queries.SELECT_USER_BY_USERNAME, (username,))
+
+            if not user_data:
+                return None
+            return queries.map_user_credentials(user_data[0])
+        except Exception as e:
+            print(f"Ошибка при получении пользователя по имени пользователя: {e}")
+            return None
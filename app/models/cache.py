@@ -0,0 +1,142 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+import psycopg
+from psycopg import sql
+from .db_config import DB_CONFIG, CACHE_CONFIG
+
+class TTLCache:
+    """
+    Потокобезопасный LRU-кэш в памяти процесса с временем жизни записей.
+
+    Записи живут ttl секунд; при превышении max_size вытесняются самые давно
+    использованные. ttl или max_size <= 0 отключают кэширование.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """
+        Удаляет запись по ключу или все записи, если ключ не указан
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """
+        Удаляет записи, для значений которых predicate(value) истинно
+        """
+        with self._lock:
+            for key, (value, _) in list(self._entries.items()):
+                if predicate(value):
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+topic_cache = TTLCache(ttl=CACHE_CONFIG['topic_ttl'], max_size=CACHE_CONFIG['max_size'])
+user_cache = TTLCache(ttl=CACHE_CONFIG['user_ttl'], max_size=CACHE_CONFIG['max_size'])
+
+def invalidate_topic(topic_id=None):
+    topic_cache.invalidate(topic_id)
+
+# Другие кэши, зависящие от пользователя (например, проверенные учётные данные)
+_user_invalidation_hooks = []
+
+def on_user_invalidated(hook):
+    """
+    Регистрирует hook(user_id), вызываемый при сбросе пользователя
+    (user_id=None — сброс всех пользователей)
+    """
+    _user_invalidation_hooks.append(hook)
+
+def invalidate_user(user_id=None):
+    user_cache.invalidate(user_id)
+    for hook in _user_invalidation_hooks:
+        hook(user_id)
+
+def invalidate_from_payload(payload: str):
+    """
+    Сбрасывает кэш по тексту уведомления: "topic:1", "user:2", "topic", "user"
+    или пустая строка (сбросить всё)
+    """
+    kind, _, item_id = (payload or "").partition(":")
+    item_id = int(item_id) if item_id.strip().isdigit() else None
+    if kind in ("", "topic"):
+        invalidate_topic(item_id if kind else None)
+    if kind in ("", "user"):
+        invalidate_user(item_id if kind else None)
+
+def cache_stats() -> dict:
+    return {"topics": topic_cache.stats(), "users": user_cache.stats()}
+
+async def listen_for_invalidations(channel: str = None):
+    """
+    Слушает канал PostgreSQL (LISTEN) и сбрасывает кэш по уведомлениям (NOTIFY).
+    При потере соединения переподключается и сбрасывает кэш целиком, так как
+    уведомления за это время могли быть пропущены.
+    """
+    channel = channel or CACHE_CONFIG['channel']
+    while True:
+        try:
+            connection = await psycopg.AsyncConnection.connect(
+                host=DB_CONFIG['host'],
+                port=DB_CONFIG['port'],
+                dbname=DB_CONFIG['database'],
+                user=DB_CONFIG['user'],
+                password=DB_CONFIG['password'],
+                autocommit=True
+            )
+            async with connection:
+                await connection.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+                invalidate_from_payload("")
+                print(f"Подписка на сброс кэша через канал {channel} установлена")
+                async for notify in connection.notifies():
+                    invalidate_from_payload(notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Ошибка подписки на сброс кэша: {e}")
+            invalidate_from_payload("")
+            await asyncio.sleep(5)
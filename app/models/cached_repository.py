@@ -0,0 +1,169 @@
+from .database import Database
+from .async_database import AsyncDatabase
+from .diploma_repository import DiplomaRepository
+from .async_diploma_repository import AsyncDiplomaRepository
+from .cache import topic_cache, user_cache, invalidate_topic, invalidate_user, cache_stats
+from . import queries
+
+class CachedDiplomaRepository(DiplomaRepository):
+    """
+    DiplomaRepository с кэшем тем и пользователей в памяти процесса.
+
+    Темы и пользователи читаются из кэша (LRU + TTL), остальные запросы идут
+    в базу как обычно. Для диплома при попадании в кэш из базы читаются только
+    задания пользователя. Найденные записи кэшируются, отсутствующие — нет.
+    """
+
+    @classmethod
+    def get_topic_by_id(cls, topic_id):
+        topic = topic_cache.get(topic_id)
+        if topic is None:
+            topic = super().get_topic_by_id(topic_id)
+            if topic:
+                topic_cache.put(topic_id, topic)
+        return dict(topic) if topic else topic
+
+    @classmethod
+    def get_topics_by_ids(cls, topic_ids):
+        topics, missing = _split_cached(topic_cache, topic_ids)
+        if missing:
+            loaded = super().get_topics_by_ids(missing)
+            for topic_id, topic in loaded.items():
+                topic_cache.put(topic_id, topic)
+            topics.update(loaded)
+        return {topic_id: dict(topic) for topic_id, topic in topics.items()}
+
+    @classmethod
+    def get_user_by_id(cls, user_id):
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user_by_id(user_id)
+            if user:
+                user_cache.put(user_id, user)
+        return dict(user) if user else user
+
+    @classmethod
+    def get_users_by_ids(cls, user_ids):
+        users, missing = _split_cached(user_cache, user_ids)
+        if missing:
+            loaded = super().get_users_by_ids(missing)
+            for user_id, user in loaded.items():
+                user_cache.put(user_id, user)
+            users.update(loaded)
+        return {user_id: dict(user) for user_id, user in users.items()}
+
+    @classmethod
+    def load_diploma_context(cls, user_id, topic_id):
+        user = user_cache.get(user_id)
+        topic = topic_cache.get(topic_id)
+        if user is None or topic is None:
+            return _remember_context(super().load_diploma_context(user_id, topic_id), user_id, topic_id)
+
+        try:
+            rows = Database.execute_query(queries.SELECT_GRADED_TASKS_BY_USER_AND_TOPIC, (user_id, topic_id))
+            tasks = [queries.map_performed_task(row) for row in rows or []]
+            return {"user": dict(user), "topic": dict(topic), "tasks": tasks}
+        except Exception as e:
+            print(f"Ошибка загрузки данных для диплома: {e}")
+            return {"user": None, "topic": None, "tasks": []}
+
+    @classmethod
+    def invalidate_topic(cls, topic_id=None):
+        invalidate_topic(topic_id)
+
+    @classmethod
+    def invalidate_user(cls, user_id=None):
+        invalidate_user(user_id)
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        return cache_stats()
+
+class AsyncCachedDiplomaRepository(AsyncDiplomaRepository):
+    """
+    Асинхронный вариант CachedDiplomaRepository с общим с ним кэшем
+    """
+
+    @classmethod
+    async def get_topic_by_id(cls, topic_id):
+        topic = topic_cache.get(topic_id)
+        if topic is None:
+            topic = await super().get_topic_by_id(topic_id)
+            if topic:
+                topic_cache.put(topic_id, topic)
+        return dict(topic) if topic else topic
+
+    @classmethod
+    async def get_topics_by_ids(cls, topic_ids):
+        topics, missing = _split_cached(topic_cache, topic_ids)
+        if missing:
+            loaded = await super().get_topics_by_ids(missing)
+            for topic_id, topic in loaded.items():
+                topic_cache.put(topic_id, topic)
+            topics.update(loaded)
+        return {topic_id: dict(topic) for topic_id, topic in topics.items()}
+
+    @classmethod
+    async def get_user_by_id(cls, user_id):
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await super().get_user_by_id(user_id)
+            if user:
+                user_cache.put(user_id, user)
+        return dict(user) if user else user
+
+    @classmethod
+    async def get_users_by_ids(cls, user_ids):
+        users, missing = _split_cached(user_cache, user_ids)
+        if missing:
+            loaded = await super().get_users_by_ids(missing)
+            for user_id, user in loaded.items():
+                user_cache.put(user_id, user)
+            users.update(loaded)
+        return {user_id: dict(user) for user_id, user in users.items()}
+
+    @classmethod
+    async def load_diploma_context(cls, user_id, topic_id):
+        user = user_cache.get(user_id)
+        topic = topic_cache.get(topic_id)
+        if user is None or topic is None:
+            context = await super().load_diploma_context(user_id, topic_id)
+            return _remember_context(context, user_id, topic_id)
+
+        try:
+            rows = await AsyncDatabase.execute_query(queries.SELECT_GRADED_TASKS_BY_USER_AND_TOPIC, (user_id, topic_id))
+            tasks = [queries.map_performed_task(row) for row in rows or []]
+            return {"user": dict(user), "topic": dict(topic), "tasks": tasks}
+        except Exception as e:
+            print(f"Ошибка загрузки данных для диплома: {e}")
+            return {"user": None, "topic": None, "tasks": []}
+
+    @classmethod
+    def invalidate_topic(cls, topic_id=None):
+        invalidate_topic(topic_id)
+
+    @classmethod
+    def invalidate_user(cls, user_id=None):
+        invalidate_user(user_id)
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        return cache_stats()
+
+def _split_cached(cache, ids) -> tuple:
+    found = {}
+    missing = []
+    for item_id in dict.fromkeys(ids):
+        value = cache.get(item_id)
+        if value is None:
+            missing.append(item_id)
+        else:
+            found[item_id] = value
+    return found, missing
+
+def _remember_context(context: dict, user_id, topic_id) -> dict:
+    if context["user"]:
+        user_cache.put(user_id, dict(context["user"]))
+    if context["topic"]:
+        topic_cache.put(topic_id, dict(context["topic"]))
+    return context
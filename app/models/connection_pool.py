@@ -0,0 +1,217 @@
+import time
+import threading
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+class PoolTimeout(PoolError):
+    pass
+
+class BlockingConnectionPool:
+    """
+    Потокобезопасный пул соединений psycopg2 с ожиданием свободного соединения.
+
+    Если все maxconn соединений заняты, getconn ждёт (в порядке очереди) не дольше
+    timeout секунд и затем выбрасывает PoolTimeout. Соединения старше max_lifetime
+    закрываются и открываются заново; простоявшие дольше check_interval секунд
+    проверяются запросом SELECT 1 перед выдачей (0 — проверять при каждой выдаче).
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float = 10, max_lifetime: float = 3600,
+                 check_interval: float = 30, autocommit: bool = False, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.autocommit = autocommit
+        self.closed = False
+        self._connect_kwargs = connect_kwargs
+        self._idle = []
+        self._created_at = {}
+        self._size = 0
+        self._waiters = []
+        self._condition = threading.Condition()
+        self._backoff = 0
+        self._retry_at = 0
+        self._last_error = None
+        self._stats = {
+            "requests": 0,
+            "requests_waited": 0,
+            "wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_recycled": 0,
+            "connections_broken": 0
+        }
+
+    def fill(self):
+        """
+        Открывает minconn соединений заранее
+        """
+        connections = []
+        try:
+            while self.size < self.minconn:
+                connections.append(self.getconn())
+        finally:
+            for connection in connections:
+                self.putconn(connection)
+
+    @property
+    def size(self) -> int:
+        with self._condition:
+            return self._size
+
+    def _connect(self):
+        # После неудачного подключения новые попытки откладываются с растущей паузой,
+        # чтобы недоступная база не задерживала каждый запрос на connect_timeout
+        with self._condition:
+            if time.monotonic() < self._retry_at:
+                raise psycopg2.OperationalError(
+                    f"База данных недоступна, повтор через {self._retry_at - time.monotonic():.1f} с: {self._last_error}"
+                )
+        try:
+            connection = psycopg2.connect(**self._connect_kwargs)
+            connection.autocommit = self.autocommit
+        except Exception as e:
+            with self._condition:
+                self._backoff = min(max(self._backoff * 2, 0.5), 30)
+                self._retry_at = time.monotonic() + self._backoff
+                self._last_error = str(e).strip()
+            raise
+        with self._condition:
+            self._backoff = 0
+            self._retry_at = 0
+            self._created_at[connection] = time.monotonic()
+            self._stats["connections_opened"] += 1
+        return connection
+
+    def _discard(self, connection):
+        self._created_at.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, connection, idle_since: float) -> bool:
+        now = time.monotonic()
+        if connection.closed:
+            self._count("connections_broken")
+            return False
+        if self.max_lifetime and now - self._created_at.get(connection, now) > self.max_lifetime:
+            self._count("connections_recycled")
+            return False
+        if now - idle_since < self.check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+            return True
+        except Exception:
+            self._count("connections_broken")
+            return False
+
+    def _count(self, name: str):
+        with self._condition:
+            self._stats[name] += 1
+
+    def getconn(self, timeout: float = None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        with self._condition:
+            if self.closed:
+                raise PoolError("Пул соединений закрыт")
+            self._stats["requests"] += 1
+            # Очередь ожидающих: соединение получает тот, кто пришёл раньше
+            ticket = object()
+            self._waiters.append(ticket)
+            try:
+                while not (self._waiters[0] is ticket and (self._idle or self._size < self.maxconn)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Нет свободного соединения в пуле за {timeout} с "
+                            f"(занято {self._size - len(self._idle)} из {self.maxconn})"
+                        )
+                    waited = True
+                    self._condition.wait(remaining)
+                    if self.closed:
+                        raise PoolError("Пул соединений закрыт")
+            finally:
+                self._waiters.remove(ticket)
+                self._condition.notify_all()
+
+            waited_ms = (time.monotonic() - started) * 1000
+            if waited:
+                self._stats["requests_waited"] += 1
+            self._stats["wait_ms"] += waited_ms
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], waited_ms)
+
+            # Слот пула закреплён за запросом: либо простаивающее соединение, либо новое
+            if self._idle:
+                connection, idle_since = self._idle.pop()
+            else:
+                connection, idle_since = None, None
+                self._size += 1
+
+        # Проверка и подключение — вне блокировки, чтобы не задерживать других
+        if connection is not None:
+            if self._is_usable(connection, idle_since):
+                return connection
+            self._discard(connection)
+        try:
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify_all()
+            raise
+
+    def putconn(self, connection, close: bool = False):
+        if not close and not connection.closed:
+            try:
+                status = connection.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Exception:
+                close = True
+
+        with self._condition:
+            if close or connection.closed or self.closed:
+                self._discard(connection)
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify_all()
+
+    def closeall(self):
+        with self._condition:
+            self.closed = True
+            for connection, _ in self._idle:
+                self._discard(connection)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "in_use": self._size - len(self._idle),
+                "idle": len(self._idle),
+                "waiting": len(self._waiters),
+                "max_size": self.maxconn,
+                "wait_ms": round(stats["wait_ms"], 1),
+                "max_wait_ms": round(stats["max_wait_ms"], 1)
+            })
+            return stats
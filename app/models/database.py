@@ -1,50 +1,66 @@
 import os
+import time
+import uuid
+import weakref
 import psycopg2
-from psycopg2 import pool
+import psycopg2.errors
+from .connection_pool import BlockingConnectionPool
 from .db_config import DB_CONFIG
+from .statements import statement_registry
 
 class Database:
     _connection_pool = None
+    # Подготовленные запросы и счётчики выполнений по соединениям
+    _prepared = weakref.WeakKeyDictionary()
+    _unpreparable = set()
     
     @classmethod
     def initialize(cls, host=None, port=None, database=None, user=None, password=None, min_conn=None, max_conn=None):
-        db_host = host or DB_CONFIG['host']
-        db_port = port or DB_CONFIG['port']
+        if cls._connection_pool is not None:
+            return
+
         db_name = database or DB_CONFIG['database']
-        db_user = user or DB_CONFIG['user']
-        db_password = password or DB_CONFIG['password']
-        db_min_conn = min_conn or DB_CONFIG['min_conn']
-        db_max_conn = max_conn or DB_CONFIG['max_conn']
+        
+        # Пул создаётся и при недоступной базе: соединения откроются при первых запросах
+        connection_pool = BlockingConnectionPool(
+            minconn=min_conn or DB_CONFIG['min_conn'],
+            maxconn=max_conn or DB_CONFIG['max_conn'],
+            timeout=DB_CONFIG['pool_timeout'],
+            max_lifetime=DB_CONFIG['pool_max_lifetime'],
+            check_interval=DB_CONFIG['pool_check_interval'],
+            host=host or DB_CONFIG['host'],
+            port=port or DB_CONFIG['port'],
+            database=db_name,
+            user=user or DB_CONFIG['user'],
+            password=password or DB_CONFIG['password'],
+            connect_timeout=DB_CONFIG['connect_timeout'],
+            autocommit=True
+        )
+        cls._connection_pool = connection_pool
         
         try:
-            cls._connection_pool = pool.ThreadedConnectionPool(
-                minconn=db_min_conn,
-                maxconn=db_max_conn,
-                host=db_host,
-                port=db_port,
-                database=db_name,
-                user=db_user,
-                password=db_password
-            )
+            connection_pool.fill()
             print(f"Пул соединений с базой данных {db_name} успешно инициализирован")
         except Exception as e:
             print(f"Ошибка инициализации пула соединений: {e}")
-            cls._connection_pool = None
     
     @classmethod
-    def get_connection(cls):
+    def get_connection(cls, timeout=None):
         if cls._connection_pool is None:
             cls.initialize()
             
-        if cls._connection_pool is None:
-            raise Exception("Пул соединений не инициализирован")
-            
-        return cls._connection_pool.getconn()
+        return cls._connection_pool.getconn(timeout)
     
     @classmethod
-    def release_connection(cls, connection):
+    def release_connection(cls, connection, close=False):
         if cls._connection_pool is not None:
-            cls._connection_pool.putconn(connection)
+            cls._connection_pool.putconn(connection, close=close)
+    
+    @classmethod
+    def stats(cls) -> dict:
+        if cls._connection_pool is None:
+            return None
+        return cls._connection_pool.stats()
     
     @classmethod
     def execute_query(cls, query, params=None):
@@ -55,20 +71,21 @@ class Database:
         try:
             connection = cls.get_connection()
             cursor = connection.cursor()
+            started = time.perf_counter()
             
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
+            cls._execute(connection, cursor, query, params)
                 
-            # Если это SELECT запрос
-            if query.lower().strip().startswith("select"):
+            # Есть описание столбцов — запрос вернул строки
+            if cursor.description is not None:
                 result = cursor.fetchall()
             
-            connection.commit()
+            # Соединения пула работают в autocommit: отдельный COMMIT не нужен
+            if not connection.autocommit:
+                connection.commit()
+            statement_registry.record(query, (time.perf_counter() - started) * 1000)
             return result
         except Exception as e:
-            if connection:
+            if connection and not connection.closed:
                 connection.rollback()
             print(f"Ошибка выполнения запроса: {e}")
             raise
@@ -78,6 +95,85 @@ class Database:
             if connection:
                 cls.release_connection(connection)
     
+    @classmethod
+    def _execute(cls, connection, cursor, query, params):
+        """
+        Выполняет запрос. Зарегистрированные запросы репозитория после
+        prepare_threshold выполнений на соединении готовятся на сервере (PREPARE)
+        и дальше выполняются через EXECUTE без повторного разбора и планирования.
+        """
+        name = statement_registry.name(query)
+        threshold = DB_CONFIG['prepare_threshold']
+        if name is None or threshold is None or not connection.autocommit or name in cls._unpreparable:
+            cursor.execute(query, params or None)
+            return
+        
+        state = cls._prepared.setdefault(connection, {"prepared": {}, "executions": {}})
+        count = state["prepared"].get(name)
+        if count is None:
+            executions = state["executions"].get(name, 0)
+            if executions < threshold:
+                state["executions"][name] = executions + 1
+                cursor.execute(query, params or None)
+                return
+            
+            statement, count = statement_registry.to_prepare(query)
+            if statement is None:
+                cls._unpreparable.add(name)
+                cursor.execute(query, params or None)
+                return
+            try:
+                cursor.execute(f"PREPARE wds_{name} AS {statement}")
+            except psycopg2.ProgrammingError as e:
+                print(f"Запрос {name} не удалось подготовить: {e}")
+                cls._unpreparable.add(name)
+                cursor.execute(query, params or None)
+                return
+            state["prepared"][name] = count
+        
+        placeholders = f" ({', '.join(['%s'] * count)})" if count else ""
+        try:
+            cursor.execute(f"EXECUTE wds_{name}{placeholders}", params or None)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Сервер потерял подготовленный запрос (например, после DISCARD ALL)
+            state["prepared"].pop(name, None)
+            cursor.execute(query, params or None)
+    
+    @classmethod
+    def iterate_query(cls, query, params=None, itersize=None):
+        """
+        Генератор строк выборки через именованный (серверный) курсор: строки
+        забираются пачками по itersize, а не загружаются в память целиком.
+        Соединение занято, пока генератор не исчерпан или не закрыт.
+        """
+        connection = cls.get_connection()
+        cursor = None
+        completed = False
+        
+        try:
+            # Серверному курсору нужна транзакция
+            connection.autocommit = False
+            cursor = connection.cursor(name=f"stream_{uuid.uuid4().hex}")
+            cursor.itersize = itersize or DB_CONFIG['itersize']
+            cursor.execute(query, params)
+            for row in cursor:
+                yield row
+            cursor.close()
+            cursor = None
+            connection.commit()
+            completed = True
+        except Exception as e:
+            print(f"Ошибка выполнения запроса: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if not connection.closed:
+                if not completed:
+                    connection.rollback()
+                connection.autocommit = True
+            cls.release_connection(connection)
+    
     @classmethod
     def close_all(cls):
         if cls._connection_pool:
@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+_prepare_threshold = os.environ.get('DB_PREPARE_THRESHOLD', '0')
+
 DB_CONFIG = {
     'host': os.environ.get('DB_HOST', 'postgres'),
     'port': int(os.environ.get('DB_PORT', 5432)),
@@ -10,5 +12,23 @@ DB_CONFIG = {
     'user': os.environ.get('DB_USER', 'weldingandsons-dbadmin'),
     'password': os.environ.get('DB_PASSWORD', '1234'),
     'min_conn': int(os.environ.get('DB_MIN_CONN', 1)),
-    'max_conn': int(os.environ.get('DB_MAX_CONN', 10))
-} 
+    'max_conn': int(os.environ.get('DB_MAX_CONN', 10)),
+    'itersize': int(os.environ.get('DB_ITERSIZE', 1000)),
+    # Сколько ждать свободного соединения, когда заняты все max_conn
+    'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    # Соединения старше этого (секунды) переоткрываются
+    'pool_max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+    # Соединение, простоявшее дольше этого (секунды), проверяется перед выдачей; 0 — всегда
+    'pool_check_interval': float(os.environ.get('DB_POOL_CHECK_INTERVAL', 30)),
+    'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+    # Через сколько выполнений запрос готовится на сервере (0 — сразу); пусто — не готовить
+    'prepare_threshold': int(_prepare_threshold) if _prepare_threshold else None
+}
+
+# Кэш тем и пользователей в памяти процесса; channel — канал LISTEN/NOTIFY для сброса кэша
+CACHE_CONFIG = {
+    'topic_ttl': float(os.environ.get('DB_CACHE_TOPIC_TTL', 600)),
+    'user_ttl': float(os.environ.get('DB_CACHE_USER_TTL', 60)),
+    'max_size': int(os.environ.get('DB_CACHE_SIZE', 1024)),
+    'channel': os.environ.get('DB_CACHE_CHANNEL', '')
+}
@@ -0,0 +1,416 @@
+import json
+
+# SQL и преобразование строк в словари, общие для синхронного и асинхронного репозиториев
+
+SELECT_TOPICS = """
+    SELECT id, code, title, description, created_at
+    FROM wds_topic
+    ORDER BY title
+"""
+
+SELECT_TOPIC_BY_ID = """
+    SELECT id, code, title, description, created_at
+    FROM wds_topic
+    WHERE id = %s
+"""
+
+SELECT_TOPICS_BY_IDS = """
+    SELECT id, code, title, description, created_at
+    FROM wds_topic
+    WHERE id = ANY(%s)
+"""
+
+SELECT_USERS = """
+    SELECT id, username, first_name, last_name, middle_name, email, created_at
+    FROM wds_user
+    WHERE enabled = true
+    ORDER BY last_name, first_name
+"""
+
+SELECT_USER_BY_ID = """
+    SELECT id, username, first_name, last_name, middle_name, email, created_at
+    FROM wds_user
+    WHERE id = %s AND enabled = true
+"""
+
+SELECT_USERS_BY_IDS = """
+    SELECT id, username, first_name, last_name, middle_name, email, created_at
+    FROM wds_user
+    WHERE id = ANY(%s) AND enabled = true
+"""
+
+SELECT_USER_BY_USERNAME = """
+    SELECT id, username, password, email, first_name, last_name, middle_name, enabled
+    FROM wds_user
+    WHERE username = %s
+"""
+
+SELECT_DIPLOMAS = """
+    SELECT d.id, d.created_at, d.grade, d.topic_id, d.user_id, d.tasks,
+           t.title as topic_title, t.code as topic_code,
+           u.first_name, u.last_name, u.middle_name
+    FROM wds_diploma d
+    JOIN wds_topic t ON d.topic_id = t.id
+    JOIN wds_user u ON d.user_id = u.id
+    ORDER BY d.created_at DESC
+"""
+
+SELECT_DIPLOMA_BY_ID = """
+    SELECT d.id, d.created_at, d.grade, d.topic_id, d.user_id, d.tasks,
+           t.title as topic_title, t.code as topic_code, t.description as topic_description,
+           u.first_name, u.last_name, u.middle_name, u.email
+    FROM wds_diploma d
+    JOIN wds_topic t ON d.topic_id = t.id
+    JOIN wds_user u ON d.user_id = u.id
+    WHERE d.id = %s
+"""
+
+SELECT_DIPLOMAS_BY_IDS = """
+    SELECT d.id, d.created_at, d.grade, d.topic_id, d.user_id, d.tasks,
+           t.title as topic_title, t.code as topic_code, t.description as topic_description,
+           u.first_name, u.last_name, u.middle_name, u.email
+    FROM wds_diploma d
+    JOIN wds_topic t ON d.topic_id = t.id
+    JOIN wds_user u ON d.user_id = u.id
+    WHERE d.id = ANY(%s)
+"""
+
+SELECT_DIPLOMAS_BY_USER_ID = """
+    SELECT d.id, d.created_at, d.grade, d.topic_id, d.tasks,
+           t.title as topic_title, t.code as topic_code
+    FROM wds_diploma d
+    JOIN wds_topic t ON d.topic_id = t.id
+    WHERE d.user_id = %s
+    ORDER BY d.created_at DESC
+"""
+
+SELECT_PERFORMED_TASKS_BY_USER_ID = """
+    SELECT pt.id, pt.created_at, pt.updated_at, pt.grade, pt.status,
+           pt.system_grade_failed, pt.task_id, pt.mentor_id,
+           pt.start_date, pt.end_date,
+           u.first_name, u.last_name, u.middle_name
+    FROM wds_perfomed_task pt
+    LEFT JOIN wds_user u ON pt.mentor_id = u.id
+    WHERE pt.user_id = %s
+    ORDER BY pt.created_at DESC
+"""
+
+SELECT_PERFORMED_TASKS_BY_USER_IDS = """
+    SELECT pt.id, pt.created_at, pt.updated_at, pt.grade, pt.status,
+           pt.system_grade_failed, pt.task_id, pt.mentor_id,
+           pt.start_date, pt.end_date,
+           u.first_name, u.last_name, u.middle_name, pt.user_id
+    FROM wds_perfomed_task pt
+    LEFT JOIN wds_user u ON pt.mentor_id = u.id
+"""
+
+SELECT_ELIGIBLE_USER_IDS_BY_TOPIC = """
+    SELECT pt.user_id
+    FROM wds_perfomed_task pt
+    JOIN wds_task t ON pt.task_id = t.id
+    JOIN wds_user u ON pt.user_id = u.id
+    WHERE t.topic_id = %s AND u.enabled = true
+    GROUP BY pt.user_id
+    HAVING COUNT(pt.grade) > 0 AND MIN(pt.grade) >= 3
+    ORDER BY pt.user_id
+"""
+
+SELECT_PERFORMED_TASK_BY_ID = """
+    SELECT pt.id, pt.created_at, pt.updated_at, pt.grade, pt.status,
+           pt.system_grade_failed, pt.task_id, pt.user_id, pt.mentor_id,
+           pt.start_date, pt.end_date,
+           s.id, s.username, s.first_name, s.last_name, s.middle_name, s.email, s.created_at,
+           m.id, m.username, m.first_name, m.last_name, m.middle_name, m.email, m.created_at
+    FROM wds_perfomed_task pt
+    LEFT JOIN wds_user s ON pt.user_id = s.id AND s.enabled = true
+    LEFT JOIN wds_user m ON pt.mentor_id = m.id AND m.enabled = true
+    WHERE pt.id = %s
+"""
+
+# Пользователь, тема и оценённые задания пользователя по этой теме одним запросом.
+# Строка-опора (SELECT 1) гарантирует результат, даже если пользователь или тема не найдены.
+SELECT_DIPLOMA_CONTEXT = """
+    SELECT u.id, u.username, u.first_name, u.last_name, u.middle_name, u.email, u.created_at,
+           tp.id, tp.code, tp.title, tp.description, tp.created_at,
+           pt.id, pt.created_at, pt.updated_at, pt.grade, pt.status,
+           pt.system_grade_failed, pt.task_id, pt.mentor_id,
+           pt.start_date, pt.end_date,
+           m.first_name, m.last_name, m.middle_name
+    FROM (SELECT 1) AS anchor
+    LEFT JOIN wds_user u ON u.id = %s AND u.enabled = true
+    LEFT JOIN wds_topic tp ON tp.id = %s
+    LEFT JOIN (wds_perfomed_task pt JOIN wds_task t ON pt.task_id = t.id)
+           ON pt.user_id = u.id AND t.topic_id = tp.id AND pt.grade IS NOT NULL
+    LEFT JOIN wds_user m ON pt.mentor_id = m.id
+    ORDER BY pt.created_at DESC
+"""
+
+# Оценённые задания пользователя по теме — часть SELECT_DIPLOMA_CONTEXT без пользователя и темы
+SELECT_GRADED_TASKS_BY_USER_AND_TOPIC = """
+    SELECT pt.id, pt.created_at, pt.updated_at, pt.grade, pt.status,
+           pt.system_grade_failed, pt.task_id, pt.mentor_id,
+           pt.start_date, pt.end_date,
+           m.first_name, m.last_name, m.middle_name
+    FROM wds_perfomed_task pt
+    JOIN wds_task t ON pt.task_id = t.id
+    LEFT JOIN wds_user m ON pt.mentor_id = m.id
+    WHERE pt.user_id = %s AND t.topic_id = %s AND pt.grade IS NOT NULL
+    ORDER BY pt.created_at DESC
+"""
+
+
+def performed_tasks_by_user_ids_query(user_ids, topic_id=None) -> tuple:
+    query = SELECT_PERFORMED_TASKS_BY_USER_IDS
+    params = [list(user_ids)]
+    if topic_id is not None:
+        query += " JOIN wds_task t ON pt.task_id = t.id AND t.topic_id = %s"
+        params.insert(0, topic_id)
+    query += " WHERE pt.user_id = ANY(%s) ORDER BY pt.user_id, pt.created_at DESC"
+    return query, tuple(params)
+
+
+# Постраничная выборка по ключу (created_at, id), от новых к старым: страница
+# продолжается строго после последней строки предыдущей, без OFFSET
+PAGE_TOPICS = """
+    SELECT id, code, title, description, created_at
+    FROM wds_topic
+"""
+
+PAGE_USERS = """
+    SELECT id, username, first_name, last_name, middle_name, email, created_at
+    FROM wds_user
+"""
+
+PAGE_DIPLOMAS = """
+    SELECT d.id, d.created_at, d.grade, d.topic_id, d.user_id, d.tasks,
+           t.title as topic_title, t.code as topic_code,
+           u.first_name, u.last_name, u.middle_name
+    FROM wds_diploma d
+    JOIN wds_topic t ON d.topic_id = t.id
+    JOIN wds_user u ON d.user_id = u.id
+"""
+
+
+def keyset_page_query(query, prefix="", conditions=(), after=None, limit=50) -> tuple:
+    """
+    Args:
+        query (str): SELECT без WHERE и ORDER BY
+        prefix (str): Псевдоним таблицы с точкой, например "d."
+        conditions (tuple): Дополнительные условия отбора
+        after (tuple): (created_at, id) последней строки предыдущей страницы
+
+    Returns:
+        tuple: (запрос, параметры)
+    """
+    conditions = list(conditions)
+    params = []
+    if after is not None:
+        conditions.append(f"({prefix}created_at, {prefix}id) < (%s, %s)")
+        params.extend(after)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {prefix}created_at DESC, {prefix}id DESC LIMIT %s"
+    params.append(limit)
+    return query, tuple(params)
+
+
+def topics_page_query(after=None, limit=50) -> tuple:
+    return keyset_page_query(PAGE_TOPICS, after=after, limit=limit)
+
+
+def users_page_query(after=None, limit=50) -> tuple:
+    return keyset_page_query(PAGE_USERS, conditions=("enabled = true",), after=after, limit=limit)
+
+
+def diplomas_page_query(after=None, limit=50) -> tuple:
+    return keyset_page_query(PAGE_DIPLOMAS, prefix="d.", after=after, limit=limit)
+
+
+def map_topic(row) -> dict:
+    return {
+        "id": row[0],
+        "code": row[1],
+        "title": row[2],
+        "description": row[3],
+        "created_at": row[4]
+    }
+
+
+def map_user(row) -> dict:
+    return {
+        "id": row[0],
+        "username": row[1],
+        "first_name": row[2],
+        "last_name": row[3],
+        "middle_name": row[4],
+        "email": row[5],
+        "created_at": row[6],
+        "full_name": f"{row[3] or ''} {row[2] or ''} {row[4] or ''}".strip()
+    }
+
+
+def map_user_credentials(row) -> dict:
+    # Формируем полное имя пользователя
+    full_name = f"{row[4] or ''} {row[5] or ''}"
+    if row[6]:  # Если есть отчество
+        full_name += f" {row[6]}"
+
+    return {
+        "id": row[0],
+        "username": row[1],
+        "password": row[2],
+        "email": row[3],
+        "first_name": row[4],
+        "last_name": row[5],
+        "middle_name": row[6],
+        "full_name": full_name.strip(),
+        "enabled": row[7]
+    }
+
+
+def decode_tasks(tasks):
+    """
+    JSON заданий диплома: текст из базы разбирается, уже разобранное значение
+    (столбец json/jsonb) возвращается как есть
+    """
+    if not tasks:
+        return {}
+    if isinstance(tasks, (str, bytes)):
+        return json.loads(tasks)
+    return tasks
+
+
+def map_diploma_summary(row) -> dict:
+    full_name = f"{row[9] or ''} {row[8] or ''} {row[10] or ''}".strip()
+    # JSON заданий в списках не разбирается: tasks — значение из базы как есть,
+    # разбирает его decode_tasks там, где задания действительно нужны
+    return {
+        "id": row[0],
+        "created_at": row[1],
+        "grade": row[2],
+        "topic_id": row[3],
+        "user_id": row[4],
+        "tasks": row[5],
+        "topic_title": row[6],
+        "topic_code": row[7],
+        "student_name": full_name
+    }
+
+
+def map_diploma(row) -> dict:
+    full_name = f"{row[10] or ''} {row[9] or ''} {row[11] or ''}".strip()
+
+    diploma = {
+        "id": row[0],
+        "created_at": row[1],
+        "grade": row[2],
+        "topic_id": row[3],
+        "user_id": row[4],
+        "tasks": decode_tasks(row[5]),
+        "topic_title": row[6],
+        "topic_code": row[7],
+        "topic_description": row[8],
+        "student": {
+            "id": row[4],
+            "first_name": row[9],
+            "last_name": row[10],
+            "middle_name": row[11],
+            "email": row[12],
+            "full_name": full_name
+        }
+    }
+    if diploma["tasks"] and isinstance(diploma["tasks"], list):
+        assignments_results = []
+        for task in diploma["tasks"]:
+            if isinstance(task, dict):
+                task_data = {
+                    "name": task.get("name", ""),
+                    "score": task.get("grade", 0),
+                    "time_spent": task.get("time", 0)
+                }
+                assignments_results.append(task_data)
+
+        diploma["assignments_results"] = assignments_results
+
+    return diploma
+
+
+def map_user_diploma(row) -> dict:
+    return {
+        "id": row[0],
+        "created_at": row[1],
+        "grade": row[2],
+        "topic_id": row[3],
+        "tasks": row[4],
+        "topic_title": row[5],
+        "topic_code": row[6]
+    }
+
+
+def map_performed_task(row) -> dict:
+    mentor_name = None
+    if row[7]:  # если есть mentor_id
+        mentor_name = f"{row[11] or ''} {row[10] or ''} {row[12] or ''}".strip()
+
+    return {
+        "id": row[0],
+        "created_at": row[1],
+        "updated_at": row[2],
+        "grade": row[3],
+        "status": row[4],
+        "system_grade_failed": row[5],
+        "task_id": row[6],
+        "mentor_id": row[7],
+        "start_date": row[8],
+        "end_date": row[9],
+        "mentor_name": mentor_name
+    }
+
+
+def map_task(row) -> dict:
+    return {
+        "id": row[0],
+        "created_at": row[1],
+        "updated_at": row[2],
+        "grade": row[3],
+        "status": row[4],
+        "system_grade_failed": row[5],
+        "task_id": row[6],
+        "user_id": row[7],
+        "mentor_id": row[8],
+        "start_date": row[9],
+        "end_date": row[10]
+    }
+
+
+def map_task_with_users(row) -> dict:
+    task = map_task(row[0:11])
+    if row[11] is not None:
+        task["student"] = map_user(row[11:18])
+    if row[18] is not None:
+        task["mentor"] = map_user(row[18:25])
+    return task
+
+
+def group_tasks_by_user(rows, user_ids) -> dict:
+    tasks = {user_id: [] for user_id in user_ids}
+    for row in rows or []:
+        tasks.setdefault(row[13], []).append(map_performed_task(row))
+    return tasks
+
+
+def map_diploma_context(rows) -> dict:
+    first = rows[0] if rows else None
+    context = {
+        "user": map_user(first[0:7]) if first and first[0] is not None else None,
+        "topic": map_topic(first[7:12]) if first and first[7] is not None else None,
+        "tasks": []
+    }
+    for row in rows or []:
+        if row[12] is not None:
+            context["tasks"].append(map_performed_task(row[12:25]))
+    return context
+
+
+# Постоянные запросы репозиториев: готовятся на сервере и учитываются в статистике по имени
+STATEMENTS = {name: value for name, value in list(globals().items()) if name.startswith("SELECT_")}
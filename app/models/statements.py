@@ -0,0 +1,92 @@
+import re
+import bisect
+import threading
+
+# Границы корзин гистограммы времени выполнения запросов, мс
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_PLACEHOLDER = re.compile(r"%s")
+
+class StatementRegistry:
+    """
+    Реестр постоянных запросов репозитория и гистограммы их времени выполнения.
+
+    Зарегистрированные запросы получают имя (по имени константы в queries.py),
+    под которым их можно подготовить на сервере (PREPARE) и под которым
+    копится статистика. Незарегистрированные запросы учитываются по началу текста.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def register(self, statements: dict):
+        """
+        Args:
+            statements (dict): Имя -> текст запроса с параметрами %s
+        """
+        for name, query in statements.items():
+            self._names[query] = name.lower()
+
+    def name(self, query: str):
+        return self._names.get(query)
+
+    @staticmethod
+    def to_prepare(query: str) -> tuple:
+        """
+        Переводит параметры %s в $1..$n для PREPARE
+
+        Returns:
+            tuple: (текст для PREPARE, число параметров) или (None, 0), если запрос
+                   использует другие виды параметров
+        """
+        if "%(" in query or "%%" in query:
+            return None, 0
+        count = 0
+
+        def number(match):
+            nonlocal count
+            count += 1
+            return f"${count}"
+
+        return _PLACEHOLDER.sub(number, query), count
+
+    def record(self, query: str, elapsed_ms: float):
+        label = self._names.get(query) or " ".join(query.split())[:80]
+        with self._lock:
+            histogram = self._histograms.get(label)
+            if histogram is None:
+                histogram = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                             "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+                self._histograms[label] = histogram
+            histogram["count"] += 1
+            histogram["total_ms"] += elapsed_ms
+            histogram["max_ms"] = max(histogram["max_ms"], elapsed_ms)
+            histogram["buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Запрос -> число выполнений, среднее и максимальное время (мс)
+                  и распределение по корзинам ("<=N ms" и ">N ms")
+        """
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            return {
+                label: {
+                    "count": histogram["count"],
+                    "avg_ms": round(histogram["total_ms"] / histogram["count"], 2),
+                    "max_ms": round(histogram["max_ms"], 2),
+                    "histogram": {
+                        bucket: count for bucket, count in zip(labels, histogram["buckets"]) if count
+                    }
+                }
+                for label, histogram in sorted(self._histograms.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+statement_registry = StatementRegistry()
@@ -0,0 +1,234 @@
+import os
+import re
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+from app.core.pdf_config import PDF_CONFIG
+from app.core.diploma_generator import DiplomaService
+from app.core.pdf_native import NativePDFRenderer, NativeRenderError, layout_matches
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_DIR = os.path.join(ROOT_DIR, "assets")
+DIPLOMA_TEMPLATE = os.path.join(ASSETS_DIR, "diploma.xlsx")
+APPENDIX_TEMPLATE = os.path.join(ASSETS_DIR, "diploma-addition.xlsx")
+FONT_PATH = PDF_CONFIG['font_path']
+
+
+class PDFReader:
+    """
+    Минимальный разбор PDF для проверок: объекты по таблице xref, страницы
+    и текст, декодированный через ToUnicode шрифта (а не через таблицы рендерера)
+    """
+
+    def __init__(self, data: bytes):
+        assert data.startswith(b"%PDF-"), "нет заголовка PDF"
+        assert data.rstrip().endswith(b"%%EOF"), "нет маркера конца файла"
+        self.data = data
+        startxref = int(re.search(rb"startxref\s+(\d+)\s+%%EOF\s*$", data).group(1))
+        assert data[startxref:startxref + 4] == b"xref", "startxref не указывает на таблицу xref"
+        header = re.match(rb"xref\s+0 (\d+)\s+", data[startxref:])
+        count = int(header.group(1))
+        entries = data[startxref + header.end():].split(b"\n")[:count]
+        self.objects = {}
+        for number, entry in enumerate(entries):
+            offset, _, kind = entry.split()
+            if kind == b"n":
+                self.objects[number] = self._read_object(number, int(offset))
+        trailer = data[data.rindex(b"trailer"):]
+        self.root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+
+    def _read_object(self, number: int, offset: int) -> tuple:
+        prefix = f"{number} 0 obj\n".encode("latin-1")
+        assert self.data[offset:offset + len(prefix)] == prefix, f"xref объекта {number} указывает мимо"
+        start = offset + len(prefix)
+        stream_at = self.data.find(b"stream\n", start)
+        end_at = self.data.find(b"endobj", start)
+        if stream_at == -1 or stream_at > end_at:
+            return self.data[start:end_at].strip(), None
+        dictionary = self.data[start:stream_at]
+        length = int(re.search(rb"/Length (\d+)", dictionary).group(1))
+        body = self.data[stream_at + 7:stream_at + 7 + length]
+        assert self.data[stream_at + 7 + length:].startswith(b"\nendstream"), f"неверная длина потока {number}"
+        if b"/FlateDecode" in dictionary:
+            body = zlib.decompress(body)
+        return dictionary, body
+
+    def ref(self, dictionary: bytes, key: str) -> int:
+        return int(re.search(rb"/" + key.encode() + rb" (\d+) 0 R", dictionary).group(1))
+
+    def pages(self) -> list:
+        pages = self.objects[self.ref(self.objects[self.root][0], "Pages")][0]
+        kids = [int(ref) for ref in re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[([^\]]*)\]", pages).group(1))]
+        assert int(re.search(rb"/Count (\d+)", pages).group(1)) == len(kids)
+        return [self.objects[kid][0] for kid in kids]
+
+    def font(self) -> tuple:
+        """
+        Returns:
+            tuple: (глиф -> символ по ToUnicode, программа шрифта FontFile2)
+        """
+        type0 = next(d for d, _ in self.objects.values() if b"/Subtype /Type0" in d)
+        cmap = self.objects[self.ref(type0, "ToUnicode")][1].decode("latin-1")
+        to_unicode = {
+            int(glyph, 16): bytes.fromhex(char).decode("utf-16-be")
+            for glyph, char in re.findall(r"<([0-9A-F]{4})> <([0-9A-F]+)>", cmap)
+        }
+        descriptor = next(d for d, _ in self.objects.values() if b"/Type /FontDescriptor" in d)
+        return to_unicode, self.objects[self.ref(descriptor, "FontFile2")][1]
+
+    def glyphs(self, page: bytes) -> list:
+        glyphs = []
+        for ref in re.findall(rb"(\d+) 0 R", re.search(rb"/Contents \[([^\]]*)\]", page).group(1)):
+            content = self.objects[int(ref)][1].decode("latin-1")
+            for text in re.findall(r"<([0-9A-F]*)> Tj", content):
+                glyphs.append([int(text[i:i + 4], 16) for i in range(0, len(text), 4)])
+        return glyphs
+
+    def page_text(self, page: bytes) -> list:
+        to_unicode, _ = self.font()
+        return ["".join(to_unicode[glyph] for glyph in line) for line in self.glyphs(page)]
+
+    def text(self) -> str:
+        return "\n".join(line for page in self.pages() for line in self.page_text(page))
+
+
+def _outline_lengths(font_file: bytes) -> list:
+    """
+    Длины контуров глифов по таблицам loca/head/maxp встроенной программы шрифта
+    """
+    tables = {}
+    for index in range(struct.unpack(">H", font_file[4:6])[0]):
+        tag, _, offset, length = struct.unpack(">4sIII", font_file[12 + 16 * index:28 + 16 * index])
+        tables[tag] = font_file[offset:offset + length]
+    num_glyphs = struct.unpack(">H", tables[b"maxp"][4:6])[0]
+    if struct.unpack(">h", tables[b"head"][50:52])[0] == 1:
+        loca = struct.unpack(f">{num_glyphs + 1}I", tables[b"loca"][:4 * (num_glyphs + 1)])
+    else:
+        loca = [2 * value for value in struct.unpack(f">{num_glyphs + 1}H", tables[b"loca"][:2 * (num_glyphs + 1)])]
+    return [loca[glyph + 1] - loca[glyph] for glyph in range(num_glyphs)]
+
+
+def _results(count: int) -> list:
+    return [{"name": f"Задание {index}", "score": 3 + index % 3, "time_spent": 10 + index}
+            for index in range(1, count + 1)]
+
+
+@unittest.skipUnless(os.path.exists(FONT_PATH), "нет шрифта для встроенного рендерера")
+class NativePDFRendererTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.renderer = NativePDFRenderer(FONT_PATH)
+
+    def render_appendix(self, results: list, topic: str = "Сварка") -> PDFReader:
+        rows = [(index, result["name"], result["score"], result["time_spent"])
+                for index, result in enumerate(results, start=1)]
+        total_score = sum(row[2] for row in rows)
+        total_time = sum(row[3] for row in rows)
+        return PDFReader(self.renderer.render_appendix(
+            topic, rows, total_score, total_time, total_score / len(rows),
+            ("Welding & Sons", "Иванов И.И.", "18.10.2026")
+        ))
+
+    def test_diploma_text_and_single_page(self):
+        pdf = PDFReader(self.renderer.render_diploma(
+            "Иванов Иван Иванович", "Сварка металлоконструкций — «ручная» дуговая", 4.5
+        ))
+        self.assertEqual(len(pdf.pages()), 1)
+        text = pdf.text()
+        for expected in ("Диплом", "Выдан:", "Тема:", "Оценка:", "Иванов Иван Иванович",
+                         "Сварка металлоконструкций — «ручная» дуговая", "4.5"):
+            self.assertIn(expected, text)
+
+    def test_short_appendix_fits_one_page(self):
+        pdf = self.render_appendix(_results(3))
+        self.assertEqual(len(pdf.pages()), 1)
+        text = pdf.text()
+        for expected in ("Результаты по теме: Сварка", "Название задания", "Задание 3",
+                         "Итого:", "Средний балл: 4.0", "Welding & Sons", "Иванов И.И.", "18.10.2026"):
+            self.assertIn(expected, text)
+
+    def test_long_appendix_continues_on_next_pages(self):
+        results = _results(60)
+        pdf = self.render_appendix(results)
+        pages = pdf.pages()
+        self.assertGreaterEqual(len(pages), 3)
+
+        lines = [pdf.page_text(page) for page in pages]
+        names = [line for page in lines for line in page if line.startswith("Задание ")]
+        self.assertEqual(names, [result["name"] for result in results])
+        # Шапка таблицы повторяется на страницах продолжения, итоги — один раз в конце
+        for page in lines[1:]:
+            if any(line.startswith("Задание ") for line in page):
+                self.assertIn("Название задания", page)
+        self.assertEqual(sum(page.count("Итого:") for page in lines), 1)
+        self.assertIn("Итого:", lines[-1])
+        self.assertIn(str(sum(result["score"] for result in results)), lines[-1])
+
+    def test_embedded_subset_has_outlines_for_used_glyphs(self):
+        pdf = self.render_appendix(_results(5), topic="Ёлочный шов: ГОСТ 5264–80 «№1»")
+        to_unicode, font_file = pdf.font()
+        outlines = _outline_lengths(font_file)
+        used = {glyph for page in pdf.pages() for line in pdf.glyphs(page) for glyph in line}
+        for glyph in used:
+            self.assertIn(glyph, to_unicode)
+            if not to_unicode[glyph].isspace():
+                self.assertGreater(outlines[glyph], 0, f"пустой контур для {to_unicode[glyph]!r}")
+        self.assertIn("Ёлочный шов: ГОСТ 5264–80 «№1»", pdf.text())
+
+    def test_characters_outside_charset_raise(self):
+        with self.assertRaises(NativeRenderError):
+            self.renderer.render_diploma("李小龍", "Сварка", 5)
+
+    def test_text_that_does_not_fit_raises(self):
+        with self.assertRaises(NativeRenderError):
+            self.renderer.render_diploma("Иванов Иван Иванович", "Очень длинная тема " * 200, 5)
+
+
+@unittest.skipUnless(os.path.exists(FONT_PATH), "нет шрифта для встроенного рендерера")
+class NativeFallbackTest(unittest.TestCase):
+
+    def service(self, diploma_template: str = DIPLOMA_TEMPLATE) -> DiplomaService:
+        with mock.patch.dict(PDF_CONFIG, engine="native"):
+            return DiplomaService(diploma_template=diploma_template, appendix_template=APPENDIX_TEMPLATE,
+                                  use_cache=False, render_workers=0)
+
+    def render(self, service: DiplomaService, full_name: str) -> tuple:
+        converted = {"diploma": b"%PDF-libreoffice", "appendix": b"%PDF-libreoffice"}
+        with mock.patch("app.core.diploma_generator.PDFService.convert_many_bytes",
+                        return_value=converted) as convert:
+            pdfs = service.render_pdfs({"full_name": full_name, "email": ""}, "Сварка", _results(2), "W&S")
+        return pdfs, convert
+
+    def test_standard_templates_render_natively(self):
+        pdfs, convert = self.render(self.service(), "Иванов Иван Иванович")
+        convert.assert_not_called()
+        self.assertIn("Иванов Иван Иванович", PDFReader(pdfs["diploma"]).text())
+
+    def test_name_outside_charset_falls_back_to_libreoffice(self):
+        pdfs, convert = self.render(self.service(), "Иванов 李小龍")
+        convert.assert_called_once()
+        self.assertEqual(pdfs["diploma"], b"%PDF-libreoffice")
+
+    def test_changed_template_falls_back_to_libreoffice(self):
+        workspace = tempfile.mkdtemp()
+        try:
+            template = os.path.join(workspace, "diploma.xlsx")
+            shutil.copy(DIPLOMA_TEMPLATE, template)
+            self.assertTrue(layout_matches(template, APPENDIX_TEMPLATE))
+            with open(template, "ab") as f:
+                f.write(b"\0")
+            self.assertFalse(layout_matches(template, APPENDIX_TEMPLATE))
+
+            service = self.service(template)
+            self.assertIsNone(service.render_native_pdfs({"full_name": "Иванов"}, "Сварка", _results(2)))
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()